@@ -0,0 +1,185 @@
+"""
+Battle stress test
+
+Runs many simultaneous battles and reports how many turns per second get
+processed. Each worker thread owns a share of the battles and keeps
+submitting an attack for both players; finished battles are deleted and
+replaced by a new one so the number of live battles stays constant.
+
+--target inproc drives server/battleHandler.py directly, --target http
+drives a server.py subprocess through /battle/create, /battle/action and
+/battle/delete over kept-alive connections.
+
+Usage:
+    python benchmarks/battle_stress.py
+    python benchmarks/battle_stress.py --target http --battles 500 --threads 32 --duration 10
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from server.battleHandler import BattleHandler
+from server_load import start_server, percentile
+
+MONSTERS = [
+    {"name": "Pikachu", "hp": 400, "max_hp": 400, "level": 10, "element": "Electric", "moves": []},
+    {"name": "Charizard", "hp": 400, "max_hp": 400, "level": 10, "element": "Fire", "moves": []},
+]
+ITEMS = [{"name": "Potion", "count": 3}]
+PARTY = {"monsters": MONSTERS, "items": ITEMS}
+
+
+class InProcess:
+    """Battle operations straight on a BattleHandler"""
+
+    def __init__(self):
+        self.handler = BattleHandler()
+
+    def connect(self):
+        return None
+
+    def create(self, conn, p1: int, p2: int) -> str:
+        return self.handler.create_battle(p1, p2, PARTY, PARTY)
+
+    def act(self, conn, battle_id: str, player_id: int) -> bool:
+        return self.handler.submit_action(battle_id, player_id, "attack", {})
+
+    def delete(self, conn, battle_id: str) -> None:
+        self.handler.delete_battle(battle_id)
+
+
+class OverHttp:
+    """The same operations against a running server.py"""
+
+    def __init__(self, port: int, players: int):
+        self.port = port
+        conn = self.connect()
+        ids = [self._call(conn, "GET", "/register")["id"] for _ in range(players)]
+        # Player 2's party is read from the server, upload it once
+        for pid in ids:
+            self._call(conn, "POST", "/players/party", {"id": pid, "version": 1, "party": PARTY})
+        conn.close()
+        self.ids = ids
+
+    def connect(self) -> http.client.HTTPConnection:
+        return http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+
+    @staticmethod
+    def _call(conn, method: str, path: str, body: dict | None = None) -> dict:
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if data else {}
+        conn.request(method, path, body=data, headers=headers)
+        resp = conn.getresponse()
+        payload = resp.read()
+        return json.loads(payload) if resp.status == 200 else {}
+
+    def create(self, conn, p1: int, p2: int) -> str:
+        body = {"player1_id": self.ids[p1], "player2_id": self.ids[p2], "player1_data": PARTY}
+        return self._call(conn, "POST", "/battle/create", body).get("battle_id", "")
+
+    def act(self, conn, battle_id: str, player_id: int) -> bool:
+        body = {"battle_id": battle_id, "player_id": self.ids[player_id], "action_type": "attack", "data": {}}
+        return bool(self._call(conn, "POST", "/battle/action", body).get("success"))
+
+    def delete(self, conn, battle_id: str) -> None:
+        self._call(conn, "POST", "/battle/delete", {"battle_id": battle_id})
+
+
+def run(target, battles: int, threads: int, duration: float) -> dict:
+    turns = [0] * threads
+    finished = [0] * threads
+    latencies: list[list[float]] = [[] for _ in range(threads)]
+    errors = [0] * threads
+    ready = threading.Barrier(threads + 1)
+    go = threading.Event()
+    stop_at = [0.0]
+
+    def worker(idx: int) -> None:
+        conn = target.connect()
+        # Battle i is fought between players 2i and 2i+1
+        owned = list(range(idx, battles, threads))
+        current = {i: target.create(conn, 2 * i, 2 * i + 1) for i in owned}
+        ready.wait()
+        go.wait()
+        samples = latencies[idx]
+        while time.monotonic() < stop_at[0]:
+            for i in owned:
+                battle_id = current[i]
+                t0 = time.perf_counter()
+                try:
+                    ok = target.act(conn, battle_id, 2 * i) and target.act(conn, battle_id, 2 * i + 1)
+                except (OSError, http.client.HTTPException):
+                    errors[idx] += 1
+                    conn.close()
+                    conn = target.connect()
+                    continue
+                samples.append(time.perf_counter() - t0)
+                if ok:
+                    turns[idx] += 1
+                else:
+                    # Someone fainted: replace the battle
+                    finished[idx] += 1
+                    target.delete(conn, battle_id)
+                    current[i] = target.create(conn, 2 * i, 2 * i + 1)
+        for battle_id in current.values():
+            target.delete(conn, battle_id)
+
+    pool = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(threads)]
+    for t in pool:
+        t.start()
+    ready.wait()
+    start = time.monotonic()
+    stop_at[0] = start + duration
+    go.set()
+    for t in pool:
+        t.join()
+    elapsed = time.monotonic() - start
+
+    merged = [s for samples in latencies for s in samples]
+    return {
+        "turns": sum(turns),
+        "turns_per_s": sum(turns) / elapsed if elapsed > 0 else 0.0,
+        "finished": sum(finished),
+        "p50_ms": percentile(merged, 50) * 1000,
+        "p99_ms": percentile(merged, 99) * 1000,
+        "errors": sum(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["inproc", "http", "both"], default="both")
+    parser.add_argument("--battles", type=int, default=200, help="simultaneous battles")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    targets = ["inproc", "http"] if args.target == "both" else [args.target]
+    print(f"{'target':>8} {'battles':>8} {'turns/s':>10} {'turns':>8} {'ended':>6} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name in targets:
+        proc = None
+        try:
+            if name == "inproc":
+                target = InProcess()
+            else:
+                proc, port = start_server(threaded=True)
+                target = OverHttp(port, 2 * args.battles)
+            r = run(target, args.battles, args.threads, args.duration)
+        finally:
+            if proc:
+                proc.terminate()
+                proc.wait(timeout=5)
+        print(f"{name:>8} {args.battles:>8} {r['turns_per_s']:>10.1f} {r['turns']:>8} {r['finished']:>6} "
+              f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
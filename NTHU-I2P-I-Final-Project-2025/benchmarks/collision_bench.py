@@ -0,0 +1,78 @@
+"""
+Map.check_collision benchmark
+
+Loads every map in assets/maps and checks random rects (tile-aligned and
+not, including empty and negative sizes) against both Map.check_collision
+and the linear `any(rect.colliderect(r) for r in _collision_map)` scan it
+replaced. Fails if the answers ever differ, then reports the time per query.
+
+Usage:
+    python benchmarks/collision_bench.py
+    python benchmarks/collision_bench.py --queries 50000 --seed 3
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+from src.maps.map import Map
+from src.utils import GameSettings
+
+
+def random_rects(rng: random.Random, width: int, height: int, n: int) -> list[pg.Rect]:
+    T = GameSettings.TILE_SIZE
+    rects = []
+    for _ in range(n):
+        x = rng.randint(-3 * T, width + 3 * T)
+        y = rng.randint(-3 * T, height + 3 * T)
+        if rng.random() < 0.5:
+            # Like the player: tile-sized, often on the grid
+            x -= x % T
+            y -= y % T
+        w = rng.choice([T, T, T, 1, 0, 2 * T + 2, -T, -3])
+        h = rng.choice([T, T, 1, 0, 3 * T, -T])
+        rects.append(pg.Rect(x, y, w, h))
+    return rects
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pg.init()
+    pg.display.set_mode((1, 1))
+    rng = random.Random(args.seed)
+    print(f"{'map':<12} {'tiles':>6} {'hits':>7} {'scan us':>9} {'grid us':>9}")
+    for name in sorted(os.listdir(os.path.join("assets", "maps"))):
+        if not name.endswith(".tmx"):
+            continue
+        m = Map(name, [])
+        rects = random_rects(rng, m.tmxdata.width * GameSettings.TILE_SIZE,
+                             m.tmxdata.height * GameSettings.TILE_SIZE, args.queries)
+
+        t0 = time.perf_counter()
+        expected = [any(r.colliderect(c) for c in m._collision_map) for r in rects]
+        scan = (time.perf_counter() - t0) / len(rects)
+        t0 = time.perf_counter()
+        got = [m.check_collision(r) for r in rects]
+        grid = (time.perf_counter() - t0) / len(rects)
+
+        for r, a, b in zip(rects, expected, got):
+            if a != b:
+                raise SystemExit(f"{name}: {r} scan says {a}, check_collision says {b}")
+        print(f"{name:<12} {len(m._collision_map):>6} {sum(got):>7} {scan * 1e6:>9.2f} {grid * 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
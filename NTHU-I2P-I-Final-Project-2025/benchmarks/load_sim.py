@@ -0,0 +1,364 @@
+"""
+Headless load generator
+
+Simulates N online clients without pygame. Each client registers through
+/register, uploads its party and walks around a map. With --client stream
+(the default) it produces OnlineManager's traffic: a sender thread posts the
+position through /batch at --send-rate, and a stream thread long-polls
+/players/stream for players around it (echoing since, the area and the battle
+it knows about) and picks up battle invitations from it. --client poll is the
+baseline client instead: POST /players, GET /players at --poll-rate and
+/battle/check every second.
+
+Clients are paired up; at --battle-rate the first of a pair challenges the
+second, and both then play the battle like BattleScene: submit an attack,
+long-poll /battle/status for the next turn, repeat until someone faints, then
+delete the battle.
+
+Reports throughput, latency percentiles and error rates per route.
+Starts its own server.py unless --url points at a running one.
+
+Usage:
+    python benchmarks/load_sim.py
+    python benchmarks/load_sim.py --clients 100 --duration 20 --send-rate 10 --battle-rate 0.05
+    python benchmarks/load_sim.py --url http://127.0.0.1:8989
+    python benchmarks/load_sim.py --client poll --send-rate 20 --poll-rate 5
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from server_load import start_server, percentile
+
+MAP = "map.tmx"
+TILE = 64
+MAP_TILES = 60  # Clients wander inside a MAP_TILES x MAP_TILES square
+DIRECTIONS = {"UP": (0, -1), "DOWN": (0, 1), "LEFT": (-1, 0), "RIGHT": (1, 0)}
+PARTY = {
+    "monsters": [
+        {"name": "Pikachu", "hp": 60, "max_hp": 60, "level": 8, "element": "Electric", "moves": []},
+        {"name": "Bulbasaur", "hp": 60, "max_hp": 60, "level": 8, "element": "Grass", "moves": []},
+    ],
+    "items": [{"name": "Potion", "count": 2}],
+}
+CHECK_INTERVAL = 1.0  # /battle/check rate, as OnlineManager without the stream
+STATUS_WAIT = 5.0     # Timeout passed to the /battle/status long-poll
+STREAM_WAIT = 20.0    # Timeout passed to the /players/stream long-poll, as OnlineManager
+STREAM_RETRY = 1.0    # Back-off after a failed stream request, as OnlineManager
+STREAM_AOI = 40       # Tiles, GameSettings.ONLINE_AOI_RADIUS (used unless --aoi is given)
+
+
+class Recorder:
+    """Latency samples and error counts per route, shared by all clients"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.battles = 0
+        self.turns = 0
+
+    def add(self, route: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.samples.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def count(self, battles: int = 0, turns: int = 0) -> None:
+        with self._lock:
+            self.battles += battles
+            self.turns += turns
+
+
+class SimClient:
+    def __init__(self, host: str, port: int, rec: Recorder, args: argparse.Namespace, rng: random.Random):
+        self.host, self.port = host, port
+        self.rec = rec
+        self.args = args
+        self.rng = rng
+        self.conn = http.client.HTTPConnection(host, port, timeout=STATUS_WAIT + 5)
+        self.player_id = -1
+        self.partner: "SimClient | None" = None
+        self.x = rng.randrange(MAP_TILES) * TILE
+        self.y = rng.randrange(MAP_TILES) * TILE
+        self.direction = "DOWN"
+
+    def call(self, method: str, path: str, body: dict | None = None, route: str | None = None,
+             allow_404: bool = False, conn: http.client.HTTPConnection | None = None) -> tuple[int, dict]:
+        """One request on `conn` (default: this client's game thread connection)"""
+        conn = conn or self.conn
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        route = route or urlsplit(path).path
+        t0 = time.perf_counter()
+        try:
+            conn.request(method, path, body=data, headers=headers)
+            resp = conn.getresponse()
+            payload = resp.read()
+        except (OSError, http.client.HTTPException):
+            self.rec.add(route, time.perf_counter() - t0, False)
+            conn.close()
+            return 0, {}
+        self.rec.add(route, time.perf_counter() - t0, resp.status < 400 or (allow_404 and resp.status == 404))
+        try:
+            return resp.status, json.loads(payload) if payload else {}
+        except ValueError:
+            return resp.status, {}
+
+    def register(self) -> None:
+        _, data = self.call("GET", "/register")
+        self.player_id = data.get("id", -1)
+        self.call("POST", "/players/party", {"id": self.player_id, "version": 1, "party": PARTY})
+
+    # ------------------------------------------------------------------
+    # Overworld
+    # ------------------------------------------------------------------
+
+    def step(self) -> dict:
+        """Move a quarter tile, returns the position update body"""
+        if self.rng.random() < 0.2:
+            self.direction = self.rng.choice(list(DIRECTIONS))
+        dx, dy = DIRECTIONS[self.direction]
+        step = TILE / 4
+        self.x = min(max(self.x + dx * step, 0), (MAP_TILES - 1) * TILE)
+        self.y = min(max(self.y + dy * step, 0), (MAP_TILES - 1) * TILE)
+        return {"id": self.player_id, "x": self.x, "y": self.y, "map": MAP, "direction": self.direction}
+
+    def walk(self) -> None:
+        self.call("POST", "/players", self.step())
+
+    def fetch_players(self) -> None:
+        if self.args.aoi:
+            query = urlencode({"map": MAP, "x": self.x, "y": self.y, "radius": self.args.aoi * TILE})
+            self.call("GET", f"/players?{query}")
+        else:
+            self.call("GET", "/players")
+
+    def check_battle(self) -> str | None:
+        _, data = self.call("GET", f"/battle/check?player_id={self.player_id}")
+        return data.get("battle_id") if data.get("has_battle") else None
+
+    def run(self, stop_at: float) -> None:
+        args = self.args
+        send_every = 1.0 / args.send_rate
+        poll_every = 1.0 / args.poll_rate
+        now = time.monotonic()
+        next_send = now + self.rng.random() * send_every
+        next_poll = now + self.rng.random() * poll_every
+        next_check = now + self.rng.random() * CHECK_INTERVAL
+        challenger = self.partner is not None and self.player_id < self.partner.player_id
+
+        while (now := time.monotonic()) < stop_at:
+            if now >= next_send:
+                next_send += send_every
+                self.walk()
+            if now >= next_poll:
+                next_poll += poll_every
+                self.fetch_players()
+            if now >= next_check:
+                next_check += CHECK_INTERVAL
+                battle_id = self.check_battle()
+                if battle_id:
+                    self.fight(battle_id, stop_at)
+                elif challenger and self.rng.random() < args.battle_rate * CHECK_INTERVAL:
+                    battle_id = self.challenge()
+                    if battle_id:
+                        self.fight(battle_id, stop_at)
+                now = time.monotonic()
+                # Don't try to catch up on sends missed while fighting
+                next_send, next_poll = max(next_send, now), max(next_poll, now)
+            time.sleep(max(0.0, min(next_send, next_poll, next_check) - time.monotonic()))
+        self.conn.close()
+
+    # ------------------------------------------------------------------
+    # Battle
+    # ------------------------------------------------------------------
+
+    def challenge(self) -> str | None:
+        status, data = self.call("POST", "/battle/create", {
+            "player1_id": self.player_id,
+            "player2_id": self.partner.player_id,
+            "player1_data": PARTY,
+        })
+        if status != 200:
+            return None
+        self.rec.count(battles=1)
+        return data.get("battle_id")
+
+    def fight(self, battle_id: str, stop_at: float) -> None:
+        base = f"/battle/status?battle_id={battle_id}&player_id={self.player_id}"
+        # The opponent may delete a finished battle first, a 404 then just means it is over
+        status, state = self.call("GET", base, allow_404=True)
+        turn = state.get("turn_count", 0)
+        while status == 200 and state.get("status") == "waiting_actions" and time.monotonic() < stop_at:
+            # Think time before choosing a move
+            time.sleep(self.rng.uniform(0, self.args.think_time))
+            self.call("POST", "/battle/action", {"battle_id": battle_id, "player_id": self.player_id,
+                                                 "action_type": "attack", "data": {"move_index": 0}})
+            status, state = self.call("GET", f"{base}&since_turn={turn}&timeout={STATUS_WAIT}",
+                                      route="/battle/status?since_turn", allow_404=True)
+            if state.get("turn_count", turn) > turn:
+                turn = state["turn_count"]
+                if self.player_id < (self.partner.player_id if self.partner else 0):
+                    self.rec.count(turns=1)
+        self.call("POST", "/battle/delete", {"battle_id": battle_id}, allow_404=True)
+
+
+class StreamClient(SimClient):
+    """
+    OnlineManager's traffic: the sender and stream threads next to the game thread,
+    which only fights. Each thread has its own connection, as with OnlineManager's pool.
+    """
+
+    def __init__(self, host: str, port: int, rec: Recorder, args: argparse.Namespace, rng: random.Random):
+        super().__init__(host, port, rec, args, rng)
+        self._lock = threading.Lock()
+        self.pending = ""             # Battle the stream last reported
+        self.left: set[str] = set()   # Battles already fought, as OnlineManager._left_battles
+        self.fighting = threading.Event()
+        self.wake = threading.Event()
+
+    def send_loop(self, stop_at: float) -> None:
+        """OnlineManager._send_loop: the latest position through /batch, unless it didn't change"""
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=STATUS_WAIT + 5)
+        every = 1.0 / self.args.send_rate
+        last = None
+        time.sleep(self.rng.random() * every)
+        while time.monotonic() < stop_at:
+            if not self.fighting.is_set():
+                body = self.step()
+                if body != last:
+                    self.call("POST", "/batch", {"ops": [{"op": "position", **body}]}, conn=conn)
+                    last = body
+            time.sleep(every)
+        conn.close()
+
+    def stream_loop(self, stop_at: float) -> None:
+        """OnlineManager._stream_players, until stop_at"""
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=STREAM_WAIT + 5)
+        seq, area = 0, None
+        radius = (self.args.aoi or STREAM_AOI) * TILE
+        while (remaining := stop_at - time.monotonic()) > 0:
+            params = {"since": seq, "timeout": round(min(STREAM_WAIT, remaining), 3),
+                      "player_id": self.player_id, "radius": radius, "battle": self.pending}
+            if area:
+                params.update(map=area["map"], x=area["x"], y=area["y"])
+            status, delta = self.call("GET", f"/players/stream?{urlencode(params)}", conn=conn)
+            if status != 200:
+                time.sleep(STREAM_RETRY)
+                continue
+            seq, area = delta.get("seq", seq), delta.get("area")
+            battle = delta.get("battle", {})
+            with self._lock:
+                self.pending = battle.get("battle_id", "") if battle.get("has_battle") else ""
+            self.wake.set()
+        conn.close()
+
+    def invitation(self) -> str | None:
+        """OnlineManager.check_pending_battle"""
+        with self._lock:
+            return self.pending if self.pending and self.pending not in self.left else None
+
+    def run(self, stop_at: float) -> None:
+        threads = [threading.Thread(target=loop, args=(stop_at,), daemon=True)
+                   for loop in (self.send_loop, self.stream_loop)]
+        for t in threads:
+            t.start()
+        challenger = self.partner is not None and self.player_id < self.partner.player_id
+        next_check = time.monotonic() + self.rng.random() * CHECK_INTERVAL
+        while time.monotonic() < stop_at:
+            # GameScene looks at the pushed invitation every frame, the stream wakes us up
+            self.wake.wait(max(0.0, min(next_check, stop_at) - time.monotonic()))
+            self.wake.clear()
+            battle_id = self.invitation()
+            if battle_id is None and challenger and time.monotonic() >= next_check:
+                next_check += CHECK_INTERVAL
+                if self.rng.random() < self.args.battle_rate * CHECK_INTERVAL:
+                    battle_id = self.challenge()
+            if battle_id:
+                self.fighting.set()
+                self.fight(battle_id, stop_at)
+                with self._lock:
+                    self.left.add(battle_id)
+                self.fighting.clear()
+                next_check = max(next_check, time.monotonic())
+        for t in threads:
+            t.join(STREAM_WAIT + 5)
+        self.conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="use a running server instead of starting one")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--client", choices=["stream", "poll"], default="stream",
+                        help="OnlineManager's stream and /batch traffic, or the baseline polling client")
+    parser.add_argument("--send-rate", type=float, default=10.0, help="position updates per second per client")
+    parser.add_argument("--poll-rate", type=float, default=5.0, help="player list fetches per second (poll client)")
+    parser.add_argument("--aoi", type=float, default=0,
+                        help=f"only players within this many tiles (0: all for poll, {STREAM_AOI} for stream)")
+    parser.add_argument("--workers", type=int, default=1, help="start the server with --workers")
+    parser.add_argument("--battle-rate", type=float, default=0.02,
+                        help="battles started per second per client pair")
+    parser.add_argument("--think-time", type=float, default=0.5, help="max seconds before each battle action")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    proc = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        proc, port = start_server(threaded=True, workers=args.workers)
+        host = "127.0.0.1"
+
+    try:
+        rec = Recorder()
+        rng = random.Random(args.seed)
+        client = StreamClient if args.client == "stream" else SimClient
+        clients = [client(host, port, rec, args, random.Random(rng.random())) for _ in range(args.clients)]
+        for c in clients:
+            c.register()
+        for a, b in zip(clients[::2], clients[1::2]):
+            a.partner, b.partner = b, a
+        # Registration traffic is not part of the measurement
+        rec.samples.clear()
+        rec.errors.clear()
+
+        start = time.monotonic()
+        stop_at = start + args.duration
+        threads = [threading.Thread(target=c.run, args=(stop_at,), daemon=True) for c in clients]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(args.duration + STREAM_WAIT + 10)
+        # Clients parked in a battle long-poll finish late, rates are over the planned duration
+        elapsed = args.duration
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=5)
+
+    total = sum(len(s) for s in rec.samples.values())
+    errors = sum(rec.errors.values())
+    print(f"{args.clients} {args.client} clients, {elapsed:.0f}s: {total / elapsed:.1f} req/s, "
+          f"{errors} errors ({100 * errors / max(total, 1):.2f}%), "
+          f"{rec.battles} battles, {rec.turns / elapsed:.1f} turns/s")
+    print(f"{'route':<26} {'count':>8} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for route, samples in sorted(rec.samples.items()):
+        print(f"{route:<26} {len(samples):>8} {len(samples) / elapsed:>9.1f} "
+              f"{percentile(samples, 50) * 1000:>8.2f} {percentile(samples, 90) * 1000:>8.2f} "
+              f"{percentile(samples, 99) * 1000:>8.2f} {rec.errors.get(route, 0):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+A* benchmark
+
+Loads a map, picks random pairs of walkable start/goal tiles and runs
+src.utils.pathfinding.a_star against `reference_a_star` below, the
+dict-and-tuple implementation it replaced. Fails if any path differs,
+then reports the time per search.
+
+It then checks jump point search (a_star(..., jump_points=True)) on the
+map and on `--random-grids` random obstacle grids: every path must be a
+valid walk of shortest length (by breadth-first search) and no longer
+than A*'s. Node expansions (heap pops) are reported for both.
+
+Finally it replays `--clicks` navigation requests through PathCache: a
+player walks between a few landmarks and asks for a path every few
+steps. Every cached or spliced path must be a valid walk at most
+2 * NAV_SPLICE_RADIUS tiles longer than the shortest one, and a grid
+with blocked tiles must neither get the plain grid's paths nor evict them.
+
+Usage:
+    python benchmarks/pathfinding_bench.py
+    python benchmarks/pathfinding_bench.py --map gym.tmx --pairs 500 --seed 3 --diagonal
+    python benchmarks/pathfinding_bench.py --random-grids 500 --clicks 2000
+"""
+
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+import types
+from collections import deque
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+from src.maps.map import Map
+from src.utils import GameSettings, pathfinding
+from src.utils.pathfinding import PathCache, PathfindingGrid, a_star, manhattan_distance
+
+
+def reference_a_star(grid: PathfindingGrid, start, goal, allow_diagonal=False):
+    """The previous a_star, minus its prints"""
+    if not grid.is_walkable(*start) or not grid.is_walkable(*goal):
+        return None
+    if start == goal:
+        return [start]
+    counter = 0
+    open_set = [(0, counter, start)]
+    came_from = {}
+    g_score = {start: 0}
+    open_set_hash = {start}
+    while open_set:
+        _, _, current = heapq.heappop(open_set)
+        open_set_hash.discard(current)
+        if current == goal:
+            path = []
+            while current in came_from:
+                path.append(current)
+                current = came_from[current]
+            path.append(start)
+            return path[::-1]
+        for neighbor in grid.get_neighbors(*current, allow_diagonal=allow_diagonal):
+            if allow_diagonal:
+                dx = abs(neighbor[0] - current[0])
+                dy = abs(neighbor[1] - current[1])
+                move_cost = 1.414 if (dx + dy) == 2 else 1.0
+            else:
+                move_cost = 1
+            tentative_g_score = g_score[current] + move_cost
+            if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                if neighbor not in open_set_hash:
+                    counter += 1
+                    heapq.heappush(open_set, (tentative_g_score + manhattan_distance(neighbor, goal), counter, neighbor))
+                    open_set_hash.add(neighbor)
+    return None
+
+
+def random_pairs(rng: random.Random, grid: PathfindingGrid, n: int) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+    tiles = [(x, y) for y in range(grid.height) for x in range(grid.width) if grid.is_walkable(x, y)]
+    pairs = [(rng.choice(tiles), rng.choice(tiles)) for _ in range(n)]
+    # A few unwalkable/out-of-map ends, which must give None
+    pairs += [((-1, 0), tiles[0]), (tiles[0], (grid.width, grid.height))]
+    return pairs
+
+
+def timed(search, grid, pairs, diagonal, **kwargs) -> tuple[list, float]:
+    t0 = time.perf_counter()
+    paths = [search(grid, s, g, diagonal, **kwargs) for s, g in pairs]
+    return paths, (time.perf_counter() - t0) / len(pairs)
+
+
+def expansions(grid, pairs, **kwargs) -> int:
+    """Total heap pops of a_star over the pairs"""
+    pops = 0
+
+    def heappop(heap):
+        nonlocal pops
+        pops += 1
+        return heapq.heappop(heap)
+
+    pathfinding.heapq = types.SimpleNamespace(heappop=heappop, heappush=heapq.heappush)
+    try:
+        for s, g in pairs:
+            a_star(grid, s, g, **kwargs)
+    finally:
+        pathfinding.heapq = heapq
+    return pops
+
+
+def shortest_length(grid: PathfindingGrid, start, goal) -> int | None:
+    """Tiles on a shortest path (breadth-first search), None if there is none"""
+    if not grid.is_walkable(*start) or not grid.is_walkable(*goal):
+        return None
+    length = {start: 1}
+    queue = deque([start])
+    while queue:
+        current = queue.popleft()
+        if current == goal:
+            return length[current]
+        for neighbor in grid.get_neighbors(*current):
+            if neighbor not in length:
+                length[neighbor] = length[current] + 1
+                queue.append(neighbor)
+    return None
+
+
+def check_walk(grid: PathfindingGrid, start, goal, path: list, limit: int | None = None) -> None:
+    """Fail unless path walks from start to goal over adjacent walkable tiles, in at most limit tiles"""
+    if path[0] != start or path[-1] != goal:
+        raise SystemExit(f"{start} -> {goal}: path has the wrong ends: {path}")
+    for p, q in zip(path, path[1:]):
+        if manhattan_distance(p, q) != 1 or not grid.is_walkable(*q):
+            raise SystemExit(f"{start} -> {goal}: path steps from {p} to {q}\n  {path}")
+    if limit is not None and len(path) > limit:
+        raise SystemExit(f"{start} -> {goal}: {len(path)} tiles, expected at most {limit}\n  {path}")
+
+
+def check_jump_points(grid: PathfindingGrid, pairs, expected: list) -> int:
+    """
+    Fail unless every JPS path is a walk of shortest length, and no longer than the A*
+    path in `expected`. Returns how many were shorter: A* can miss the shortest path,
+    it keeps an open tile's old heap entry when a shorter way to it turns up.
+    """
+    shorter = 0
+    for (s, g), a in zip(pairs, expected):
+        b = a_star(grid, s, g, jump_points=True)
+        best = shortest_length(grid, s, g)
+        if (b and len(b)) != best or (a is None) != (b is None) or (a and len(a) < len(b)):
+            raise SystemExit(f"{s} -> {g}: A* length {a and len(a)}, JPS length {b and len(b)}, "
+                             f"shortest {best}\n  JPS: {b}")
+        if b is None:
+            continue
+        shorter += len(b) < len(a)
+        check_walk(grid, s, g, b)
+    return shorter
+
+
+def random_grid(rng: random.Random) -> PathfindingGrid:
+    width, height = rng.randint(1, 30), rng.randint(1, 30)
+    density = rng.choice([0.0, 0.1, 0.25, 0.4])
+    walkable = bytearray(rng.random() >= density for _ in range(width * height))
+    return PathfindingGrid(width, height, walkable)
+
+
+def replay_clicks(grid: PathfindingGrid, rng: random.Random, clicks: int) -> None:
+    """Walk between landmarks asking for paths through a PathCache, and without one"""
+    tiles = [(x, y) for y in range(grid.height) for x in range(grid.width) if grid.is_walkable(x, y)]
+    landmarks = [rng.choice(tiles) for _ in range(4)]
+    position = rng.choice(tiles)
+    requests = []
+    while len(requests) < clicks:
+        goal = rng.choice(landmarks)
+        path = a_star(grid, position, goal, jump_points=True)
+        if path is None:
+            position = rng.choice(tiles)
+            continue
+        # Ask again every few steps along the way, as a player clicking "Go" would
+        for i in range(0, len(path), rng.randint(1, 6)):
+            requests.append((path[i], goal))
+        position = path[rng.randrange(len(path))]
+    requests = requests[:clicks]
+
+    cache = PathCache()
+    t0 = time.perf_counter()
+    cached = [cache.find_path("bench", grid, s, g) for s, g in requests]
+    with_cache = (time.perf_counter() - t0) / len(requests)
+    _, without = timed(a_star, grid, requests, False, jump_points=True)
+    for (s, g), path in zip(requests, cached):
+        check_walk(grid, s, g, path, shortest_length(grid, s, g) + 2 * cache.splice_radius)
+    print(f"path cache: {len(requests)} requests, {cache.hits} hits, {cache.splices} spliced, {cache.misses} searched")
+    print(f"uncached {without * 1e3:8.3f} ms/request")
+    print(f"cached   {with_cache * 1e3:8.3f} ms/request  ({without / with_cache:.1f}x)")
+
+    # Blocking a tile of a cached path must not hand that path out again
+    (s, g), path = next(((r, p) for r, p in zip(reversed(requests), reversed(cached)) if len(p) > 2), (None, None))
+    if path:
+        path = cache.find_path("bench", grid, s, g)
+        T = GameSettings.TILE_SIZE
+        blocked = grid.with_blocked([pg.Rect(path[1][0] * T, path[1][1] * T, T, T)])
+        again = cache.find_path("bench", blocked, s, g)
+        if again is not None:
+            # check_walk fails on the blocked tile
+            check_walk(blocked, s, g, again)
+        # ... while the plain grid's entries stay, alongside the blocked grid's
+        hits = cache.hits
+        if cache.find_path("bench", grid, s, g) != path or cache.find_path("bench", blocked, s, g) != again \
+                or cache.hits != hits + 2:
+            raise SystemExit("path cache: plain and blocked grids evicted each other")
+        print("path cache: separate entries for the plain and the blocked grid")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--map", default="map.tmx")
+    parser.add_argument("--pairs", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--diagonal", action="store_true")
+    parser.add_argument("--random-grids", type=int, default=200)
+    parser.add_argument("--clicks", type=int, default=1000)
+    args = parser.parse_args()
+
+    pg.init()
+    pg.display.set_mode((1, 1))
+    grid = Map(args.map, []).pathfinding_grid
+    pairs = random_pairs(random.Random(args.seed), grid, args.pairs)
+
+    expected, before = timed(reference_a_star, grid, pairs, args.diagonal)
+    got, after = timed(a_star, grid, pairs, args.diagonal)
+    for (s, g), a, b in zip(pairs, expected, got):
+        if a != b:
+            raise SystemExit(f"{s} -> {g}: paths differ\n  before: {a}\n  after:  {b}")
+
+    found = [p for p in got if p]
+    print(f"{args.map}: {len(pairs)} searches, {len(found)} paths, "
+          f"mean length {sum(map(len, found)) / max(1, len(found)):.1f}, all identical")
+    print(f"before {before * 1e3:8.3f} ms/search")
+    print(f"after  {after * 1e3:8.3f} ms/search  ({before / after:.1f}x)")
+
+    expected = got if not args.diagonal else timed(a_star, grid, pairs, False)[0]
+    shorter = check_jump_points(grid, pairs, expected)
+    _, jps = timed(a_star, grid, pairs, False, jump_points=True)
+    _, astar = timed(a_star, grid, pairs, False)
+    print(f"jump points: all shortest, {shorter} shorter than A*")
+    print(f"A*  {astar * 1e3:8.3f} ms/search  {expansions(grid, pairs) / len(pairs):6.0f} expansions/search")
+    print(f"JPS {jps * 1e3:8.3f} ms/search  {expansions(grid, pairs, jump_points=True) / len(pairs):6.0f} expansions/search")
+
+    rng = random.Random(args.seed)
+    shorter = 0
+    for _ in range(args.random_grids):
+        grid = random_grid(rng)
+        pairs = [((rng.randrange(grid.width), rng.randrange(grid.height)),
+                  (rng.randrange(grid.width), rng.randrange(grid.height))) for _ in range(20)]
+        shorter += check_jump_points(grid, pairs, [a_star(grid, s, g) for s, g in pairs])
+    print(f"jump points on {args.random_grids} random grids: all shortest, {shorter} shorter than A*")
+
+    replay_clicks(Map(args.map, []).pathfinding_grid, random.Random(args.seed), args.clicks)
+
+if __name__ == "__main__":
+    main()
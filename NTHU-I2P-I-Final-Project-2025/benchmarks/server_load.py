@@ -0,0 +1,144 @@
+"""
+Load benchmark for server.py
+
+Starts the server in a subprocess (single-threaded and/or threaded mode),
+then hammers GET /players from N concurrent clients and reports
+requests/sec and latency percentiles for each client count.
+
+Usage:
+    python benchmarks/server_load.py
+    python benchmarks/server_load.py --mode threaded --clients 1 8 32 64 --duration 5
+    python benchmarks/server_load.py --mode threaded --workers 4 --keepalive
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request(port: int, method: str, path: str) -> bytes:
+    # A new connection per request
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        conn.request(method, path)
+        resp = conn.getresponse()
+        return resp.read()
+    finally:
+        conn.close()
+
+
+def start_server(threaded: bool, workers: int = 1) -> tuple[subprocess.Popen, int]:
+    port = _free_port()
+    cmd = [sys.executable, "server.py", "--port", str(port), "--quiet"]
+    if not threaded:
+        cmd.append("--single-threaded")
+    elif workers > 1:
+        cmd += ["--workers", str(workers)]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            _request(port, "GET", "/")
+            return proc, port
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def run_load(port: int, clients: int, duration: float, keepalive: bool = False) -> dict:
+    latencies: list[list[float]] = [[] for _ in range(clients)]
+    errors = [0] * clients
+    stop_at = time.monotonic() + duration
+
+    def worker(idx: int) -> None:
+        samples = latencies[idx]
+        # One reused HTTP/1.1 connection per client, like OnlineManager's pooled session
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10) if keepalive else None
+        while time.monotonic() < stop_at:
+            t0 = time.perf_counter()
+            try:
+                if conn:
+                    conn.request("GET", "/players")
+                    conn.getresponse().read()
+                else:
+                    _request(port, "GET", "/players")
+            except (OSError, http.client.HTTPException):
+                errors[idx] += 1
+                if conn:
+                    conn.close()
+                continue
+            samples.append(time.perf_counter() - t0)
+        if conn:
+            conn.close()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(clients)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+
+    merged = [s for samples in latencies for s in samples]
+    return {
+        "clients": clients,
+        "requests": len(merged),
+        "rps": len(merged) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(merged, 50) * 1000,
+        "p99_ms": percentile(merged, 99) * 1000,
+        "errors": sum(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["single", "threaded", "both"], default="both")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per client count")
+    parser.add_argument("--players", type=int, default=20, help="players registered before the run")
+    parser.add_argument("--keepalive", action="store_true", help="reuse one connection per client")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for the threaded server")
+    args = parser.parse_args()
+
+    modes = ["single", "threaded"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        proc, port = start_server(threaded=(mode == "threaded"), workers=args.workers)
+        try:
+            for _ in range(args.players):
+                _request(port, "GET", "/register")
+
+            print(f"\n== {mode} ==")
+            print(f"{'clients':>8} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'errors':>8}")
+            for n in args.clients:
+                r = run_load(port, n, args.duration, args.keepalive)
+                print(f"{r['clients']:>8} {r['rps']:>10.1f} {r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f} {r['errors']:>8}")
+        finally:
+            proc.terminate()
+            proc.wait(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Position wire format benchmark
+
+Compares encoding and decoding a position update with json.dumps/json.loads
+against the binary struct in src/utils/wire.py, for a single update (what a
+client uploads) and for a batch of updates.
+
+Usage:
+    python benchmarks/wire_format.py
+    python benchmarks/wire_format.py --batch 200 --repeat 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils import wire
+
+MAPS = ["map.tmx", "gym.tmx", "Shop.tmx"]
+
+
+def make_records(n: int) -> list[tuple[int, float, float, int, str]]:
+    rng = random.Random(0)
+    return [
+        (i, rng.uniform(0, 64 * 100), rng.uniform(0, 64 * 100), rng.randrange(len(MAPS)), rng.choice(wire.DIRECTIONS))
+        for i in range(n)
+    ]
+
+
+def as_json(record: tuple[int, float, float, int, str]) -> dict:
+    pid, x, y, map_index, direction = record
+    return {"id": pid, "x": x, "y": y, "map": MAPS[map_index], "direction": direction}
+
+
+def bench(label: str, fn, repeat: int) -> float:
+    best = min(timeit.repeat(fn, number=repeat, repeat=3)) / repeat
+    print(f"  {label:<22} {best * 1e6:>9.2f} us")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=50, help="updates per batch")
+    parser.add_argument("--repeat", type=int, default=10000)
+    args = parser.parse_args()
+
+    record = make_records(1)[0]
+    body = as_json(record)
+    json_bytes = json.dumps(body).encode("utf-8")
+    bin_bytes = wire.pack_position(*record)
+
+    print(f"single update: json {len(json_bytes)} bytes, binary {len(bin_bytes)} bytes")
+    je = bench("json encode", lambda: json.dumps(body).encode("utf-8"), args.repeat)
+    be = bench("binary encode", lambda: wire.pack_position(*record), args.repeat)
+    jd = bench("json decode", lambda: json.loads(json_bytes.decode("utf-8")), args.repeat)
+    bd = bench("binary decode", lambda: wire.unpack_position(bin_bytes), args.repeat)
+    print(f"  speedup: encode x{je / be:.1f}, decode x{jd / bd:.1f}")
+
+    records = make_records(args.batch)
+    bodies = [as_json(r) for r in records]
+    json_batch = json.dumps(bodies).encode("utf-8")
+    bin_batch = wire.pack_positions(records)
+    repeat = max(1, args.repeat // args.batch)
+
+    print(f"\nbatch of {args.batch}: json {len(json_batch)} bytes, binary {len(bin_batch)} bytes")
+    je = bench("json encode", lambda: json.dumps(bodies).encode("utf-8"), repeat)
+    be = bench("binary encode", lambda: wire.pack_positions(records), repeat)
+    jd = bench("json decode", lambda: json.loads(json_batch.decode("utf-8")), repeat)
+    bd = bench("binary decode", lambda: wire.unpack_positions(bin_batch), repeat)
+    print(f"  speedup: encode x{je / be:.1f}, decode x{jd / bd:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,138 @@
-from server.playerHandler import PlayerHandler
+from server.playerHandler import PlayerHandler, Area
+from server import battleHandler, cluster
 from server.battleHandler import BattleHandler
+from server.metrics import Metrics, merge_counts
+from server.journal import Journal
+from src.utils import wire
 
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit, parse_qsl
+import argparse
+import http.client
 import json
+import math
+import os
+import signal
+import sys
+import time
 PORT = 8989
+STREAM_TIMEOUT = 25.0  # Longest time a /players/stream request is held open
+BATTLE_WAIT_TIMEOUT = 20.0  # Longest time a /battle/status?since_turn= request is held open
+DEFAULT_AOI_RADIUS = 40 * 64  # Pixels, used when a client filters by map without a radius
+MAX_AOI_RADIUS = 4 * DEFAULT_AOI_RADIUS  # Larger radii are clamped, the index lookup grows with its square
+MAX_BATCH_OPS = 16  # Operations accepted in one /batch request
 
 PLAYER_HANDLER = PlayerHandler()
 PLAYER_HANDLER.start()
 
-BATTLE_HANDLER = BattleHandler()
+BATTLE_HANDLER = BattleHandler(on_change=PLAYER_HANDLER.notify)
+BATTLE_HANDLER.start()
+# The game's own maps always have an index, however many names clients send in
+MAPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "maps")
+KNOWN_MAPS = sorted(name for name in os.listdir(MAPS_DIR) if name.endswith(".tmx"))
+MAP_NAMES = [""] + KNOWN_MAPS  # "" is where a player is before their first update
+MAP_TABLE = wire.MapTable(MAP_NAMES)
+CLUSTER: cluster.Worker | None = None  # Set in each worker process with --workers
+
+METRICS = Metrics()
+
+def register_metrics() -> None:
+    METRICS.add_lock("player_handler", PLAYER_HANDLER.lock_stats)
+    METRICS.add_lock("battle_handler", BATTLE_HANDLER.lock_stats)
+    METRICS.add_lock("battles", battleHandler.BATTLE_LOCK_STATS)
+    METRICS.add_gauge("players", PLAYER_HANDLER.player_count)
+    METRICS.add_gauge("battles", lambda: BATTLE_HANDLER.get_stats()["live"])
+    METRICS.add_counter("turns", lambda: BATTLE_HANDLER.get_stats()["turns"])
+
+register_metrics()
+# Anything else is reported under "other" so junk paths can't grow the table
+ROUTES = {
+    "/", "/wire", "/register", "/players", "/batch", "/players/stream", "/players/party", "/maps", "/metrics",
+    "/metrics/worker",
+    "/battle/check", "/battle/stats", "/battle/status", "/battle/create", "/battle/action",
+    "/battle/end", "/battle/delete",
+}
     
 class Handler(BaseHTTPRequestHandler):
+    # Persistent connections, every response carries a Content-Length
+    protocol_version = "HTTP/1.1"
+    timeout = 60  # Close idle kept-alive connections
+    # Headers and body go out as separate writes, Nagle would delay the body on a reused connection
+    disable_nagle_algorithm = True
     # def log_message(self, fmt, *args):
     #     return
 
+    def parse_request(self) -> bool:
+        # Start of the request for the latency metrics, the body is read after this
+        self._started = time.perf_counter()
+        return super().parse_request()
+
     def do_GET(self):
         if self.path == "/":
             self._json(200, {"status": "ok"})
             return
             
+        # Wire formats this server accepts for position updates
+        if self.path == "/wire":
+            self._json(200, {"formats": ["json", "binary"], "content_type": wire.CONTENT_TYPE})
+            return
+
+        if self.path == "/metrics":
+            self._json(200, self._cluster_metrics() if CLUSTER else METRICS.report())
+            return
+
+        # This process only, in --workers mode asked for by the worker answering /metrics
+        if self.path == "/metrics/worker":
+            self._json(200, {"worker": CLUSTER.index if CLUSTER else 0, **METRICS.report()})
+            return
+
         if self.path == "/register":
-            pid = PLAYER_HANDLER.register()
+            try:
+                pid = PLAYER_HANDLER.register()
+            except RuntimeError:
+                # Only the fixed-size table of --workers mode fills up
+                self._json(503, {"error": "server_full"})
+                return
             self._json(200, {"message": "registration successful", "id": pid})
             return
 
-        if self.path == "/players":
-            self._json(200, {"players": PLAYER_HANDLER.list_players()})
+        if urlsplit(self.path).path == "/players":
+            self._reply(*self._players(self._params()))
+            return
+
+        # Long-poll player stream: returns as soon as something changed after `since`
+        if self.path.startswith("/players/stream"):
+            params = self._params()
+            try:
+                timeout = self._timeout(params, STREAM_TIMEOUT)
+            except ValueError:
+                self._json(400, {"error": "bad_timeout"})
+                return
+            try:
+                since = int(params.get("since", 0))
+                viewer = int(params["player_id"]) if "player_id" in params else None
+                radius = self._radius(params, 0.0)
+                area = self._area(params) if "map" in params else None
+            except ValueError:
+                self._json(400, {"error": "bad_fields"})
+                return
+
+            # Battle invitations ride on the same stream: wake up when the viewer's
+            # battle differs from the one the client already knows about
+            known_battle = params.get("battle", "")
+            until = None
+            if viewer is not None:
+                until = lambda: self._pending_battle(viewer).get("battle_id", "") != known_battle
+
+            # Holding the only request thread would stall every other client
+            if not isinstance(self.server, ThreadingMixIn):
+                timeout = 0.0
+            delta = PLAYER_HANDLER.wait_for_delta(since, timeout, viewer=viewer, radius=radius,
+                                                  area=area, until=until)
+            if viewer is not None:
+                delta["battle"] = self._pending_battle(viewer)
+            self._json(200, delta)
             return
         
         # Check if player has pending battle
@@ -39,21 +146,20 @@ class Handler(BaseHTTPRequestHandler):
                     self._json(400, {"error": "missing_parameters"})
                     return
                 
-                battle = BATTLE_HANDLER.get_player_battle(player_id)
-                if battle:
-                    self._json(200, {
-                        "has_battle": True,
-                        "battle_id": battle.battle_id,
-                        "opponent_id": battle.player1_id if player_id == battle.player2_id else battle.player2_id
-                    })
-                else:
-                    self._json(200, {"has_battle": False})
+                self._json(200, self._pending_battle(player_id))
             except Exception as e:
                 self._json(400, {"error": "invalid_request", "message": str(e)})
             return
         
+        # Live/created/deleted/reaped battle counters
+        if self.path == "/battle/stats":
+            self._json(200, BATTLE_HANDLER.get_stats())
+            return
+        
         # Battle status endpoint
         if self.path.startswith("/battle/status"):
+            if self._forward(self._params().get("battle_id", "")):
+                return
             try:
                 # Parse query parameters
                 query = self.path.split("?")[1] if "?" in self.path else ""
@@ -65,7 +171,19 @@ class Handler(BaseHTTPRequestHandler):
                     self._json(400, {"error": "missing_parameters"})
                     return
                 
-                status = BATTLE_HANDLER.get_battle_status(battle_id, player_id)
+                # With since_turn, wait for the next turn and answer with only what it changed
+                if "since_turn" in params:
+                    since_turn = int(params["since_turn"])
+                    try:
+                        timeout = self._timeout(params, BATTLE_WAIT_TIMEOUT)
+                    except ValueError:
+                        self._json(400, {"error": "bad_timeout"})
+                        return
+                    if not isinstance(self.server, ThreadingMixIn):
+                        timeout = 0.0
+                    status = BATTLE_HANDLER.wait_for_turn(battle_id, player_id, since_turn, timeout)
+                else:
+                    status = BATTLE_HANDLER.get_battle_status(battle_id, player_id)
                 if status:
                     self._json(200, status)
                 else:
@@ -76,8 +194,31 @@ class Handler(BaseHTTPRequestHandler):
 
         self._json(404, {"error": "not_found"})
 
+    def _binary_post(self, body: bytes) -> None:
+        """Binary position updates (see src/utils/wire.py)"""
+        if self.path != "/players":
+            self._json(404, {"error": "not_found"})
+            return
+        try:
+            pid, x, y, map_index, direction = wire.unpack_position(body)
+        except ValueError:
+            self._json(400, {"error": "bad_fields"})
+            return
+        map_name = MAP_TABLE.name_of(map_index)
+        if map_name is None:
+            self._json(400, {"error": "unknown_map"})
+            return
+
+        if not PLAYER_HANDLER.update(pid, x, y, map_name, direction):
+            self._json(404, {"error": "player_not_found"})
+            return
+        self._send_bytes(204, b"")
+
     def do_POST(self):
         length = int(self.headers.get("Content-Length", "0"))
+        if self.headers.get("Content-Type") == wire.CONTENT_TYPE:
+            self._binary_post(self.rfile.read(length))
+            return
         try:
             body = self.rfile.read(length)
             data = json.loads(body.decode("utf-8"))
@@ -87,31 +228,53 @@ class Handler(BaseHTTPRequestHandler):
         
         # Update player position
         if self.path == "/players":
-            missing = [k for k in ("id", "x", "y", "map", "direction") if k not in data]
-            if missing:
-                self._json(400, {"error": "bad_fields", "missing": missing})
+            self._reply(*self._update_position(data))
+            return
+
+        # Battles are handled by the worker that owns them
+        if self.path in ("/battle/action", "/battle/end", "/battle/delete") and isinstance(data, dict):
+            if self._forward(str(data.get("battle_id", "")), body):
                 return
 
+        # Several operations in one round-trip, results come back in the same order
+        if self.path == "/batch":
+            ops = data.get("ops") if isinstance(data, dict) else None
+            if not isinstance(ops, list) or len(ops) > MAX_BATCH_OPS:
+                self._json(400, {"error": "bad_fields"})
+                return
+            results = []
+            for op in ops:
+                code, payload = self._batch_op(op)
+                if not isinstance(payload, bytes):
+                    payload = json.dumps(payload).encode("utf-8")
+                # Pre-serialized payloads (the player snapshot) are spliced in as-is
+                results.append(b'{"status": %d, "body": %s}' % (code, payload))
+            self._send_bytes(200, b'{"results": [' + b", ".join(results) + b"]}")
+            return
+        
+        # Intern a map name for the binary position format
+        if self.path == "/maps":
             try:
-                pid = int(data["id"])
-                x = float(data["x"])
-                y = float(data["y"])
                 map_name = str(data["map"])
-                direction = str(data["direction"])
-                monsters = data.get("monsters", None)  # Optional
-                items = data.get("items", None)        # Optional
-            except (ValueError, TypeError):
+            except (KeyError, TypeError):
                 self._json(400, {"error": "bad_fields"})
                 return
-
-            ok = PLAYER_HANDLER.update(pid, x, y, map_name, direction, monsters, items)
-            if not ok:
-                self._json(404, {"error": "player_not_found"})
+            try:
+                index = MAP_TABLE.index_of(map_name)
+            except ValueError as e:
+                self._json(400, {"error": "bad_map", "message": str(e)})
                 return
+            except RuntimeError:
+                self._json(503, {"error": "map_table_full"})
+                return
+            self._json(200, {"map": map_name, "index": index})
+            return
 
-            self._json(200, {"success": True})
+        # Update player monsters and items (sent only when they change)
+        if self.path == "/players/party":
+            self._reply(*self._update_party(data))
             return
-        
+
         # Create battle
         if self.path == "/battle/create":
             try:
@@ -122,24 +285,24 @@ class Handler(BaseHTTPRequestHandler):
                 if "player1_data" in data:
                     player1_data = data["player1_data"]
                 else:
-                    player1_info = PLAYER_HANDLER.get_player_data(player1_id)
-                    if not player1_info:
+                    player1_party = PLAYER_HANDLER.get_party(player1_id)
+                    if not player1_party:
                         self._json(404, {"error": "player1_not_found"})
                         return
                     player1_data = {
-                        "monsters": player1_info["monsters"],
-                        "items": player1_info["items"]
+                        "monsters": player1_party.monsters,
+                        "items": player1_party.items
                     }
                 
-                # Fetch player2 data from handler
-                player2_info = PLAYER_HANDLER.get_player_data(player2_id)
-                if not player2_info:
+                # Fetch player2 data from handler (shared snapshot, the battle makes its own copies)
+                player2_party = PLAYER_HANDLER.get_party(player2_id)
+                if not player2_party:
                     self._json(404, {"error": "player2_not_found"})
                     return
                 
                 player2_data = {
-                    "monsters": player2_info["monsters"],
-                    "items": player2_info["items"]
+                    "monsters": player2_party.monsters,
+                    "items": player2_party.items
                 }
                 
                 battle_id = BATTLE_HANDLER.create_battle(
@@ -150,8 +313,8 @@ class Handler(BaseHTTPRequestHandler):
                 self._json(200, {
                     "success": True,
                     "battle_id": battle_id,
-                    "player2_monsters": player2_info["monsters"],
-                    "player2_items": player2_info["items"],
+                    "player2_monsters": player2_party.monsters,
+                    "player2_items": player2_party.items,
                     "message": "Battle created"
                 })
             except Exception as e:
@@ -203,15 +366,275 @@ class Handler(BaseHTTPRequestHandler):
 
         self._json(404, {"error": "not_found"})
 
+    # Operations shared by the single routes and /batch, returning (status, JSON object or bytes)
+    @staticmethod
+    def _players(params: dict) -> tuple[int, object]:
+        if "map" not in params:
+            return 200, PLAYER_HANDLER.players_snapshot()
+        try:
+            area = Handler._area(params)
+        except (ValueError, TypeError):
+            return 400, {"error": "bad_fields"}
+        return 200, {"players": PLAYER_HANDLER.players_near(area)}
+
+    @staticmethod
+    def _update_position(data: dict) -> tuple[int, object]:
+        missing = [k for k in ("id", "x", "y", "map", "direction") if k not in data]
+        if missing:
+            return 400, {"error": "bad_fields", "missing": missing}
+
+        try:
+            pid = int(data["id"])
+            x = Handler._finite(data["x"])
+            y = Handler._finite(data["y"])
+            map_name = str(data["map"])
+            direction = str(data["direction"])
+            monsters = Handler._entries(data.get("monsters", None))  # Optional
+            items = Handler._entries(data.get("items", None))        # Optional
+        except (ValueError, TypeError):
+            return 400, {"error": "bad_fields"}
+
+        if CLUSTER:
+            # The shared player table stores maps by index, from a table of fixed size
+            try:
+                MAP_TABLE.index_of(map_name)
+            except ValueError as e:
+                return 400, {"error": "bad_map", "message": str(e)}
+            except RuntimeError:
+                return 503, {"error": "map_table_full"}
+        try:
+            if not PLAYER_HANDLER.update(pid, x, y, map_name, direction, monsters, items):
+                return 404, {"error": "player_not_found"}
+        except ValueError as e:
+            # Party too large for the shared table in --workers mode
+            return 400, {"error": "bad_fields", "message": str(e)}
+        return 200, {"success": True}
+
+    @staticmethod
+    def _update_party(data: dict) -> tuple[int, object]:
+        try:
+            pid = int(data["id"])
+            version = int(data["version"])
+            monsters = Handler._entries(data["party"]["monsters"])
+            items = Handler._entries(data["party"]["items"])
+            if monsters is None or items is None:
+                raise ValueError("party needs monsters and items")
+        except (KeyError, ValueError, TypeError):
+            return 400, {"error": "bad_fields"}
+
+        try:
+            if not PLAYER_HANDLER.update_party(pid, monsters, items, version):
+                return 404, {"error": "player_not_found"}
+        except ValueError as e:
+            # Party too large for the shared table in --workers mode
+            return 400, {"error": "bad_fields", "message": str(e)}
+        return 200, {"success": True, "version": version}
+
+    @staticmethod
+    def _batch_op(op: object) -> tuple[int, object]:
+        # Ops carry arbitrary JSON: whatever one of them trips over, the others still get answered
+        try:
+            return Handler._run_op(op)
+        except Exception as e:
+            return 400, {"error": "bad_fields", "message": f"{type(e).__name__}: {e}"}
+
+    @staticmethod
+    def _run_op(op: object) -> tuple[int, object]:
+        if not isinstance(op, dict):
+            return 400, {"error": "bad_fields"}
+        kind = op.get("op")
+        if kind == "position":
+            return Handler._update_position(op)
+        if kind == "party":
+            return Handler._update_party(op)
+        if kind == "players":
+            return Handler._players({k: op[k] for k in ("map", "x", "y", "radius") if k in op})
+        if kind == "battle_check":
+            try:
+                return 200, Handler._pending_battle(int(op["player_id"]))
+            except (KeyError, ValueError, TypeError):
+                return 400, {"error": "bad_fields"}
+        return 400, {"error": "unknown_op", "op": kind}
+
+    @staticmethod
+    def _cluster_metrics() -> dict:
+        """Every worker's report, labelled with its index, and the request totals over all of them"""
+        workers = {}
+        for index in range(len(CLUSTER.ports)):
+            if index == CLUSTER.index:
+                workers[str(index)] = METRICS.report()
+                continue
+            try:
+                code, payload = CLUSTER.forward(index, "GET", "/metrics/worker", None, None)
+                workers[str(index)] = json.loads(payload) if code == 200 else None
+            except (OSError, http.client.HTTPException, ValueError):
+                workers[str(index)] = None  # Busy or gone, the others still get reported
+        for index, report in workers.items():
+            if report is not None:
+                report["worker"] = int(index)
+        return {"worker": CLUSTER.index, **merge_counts([r for r in workers.values() if r]), "workers": workers}
+
+    def _forward(self, battle_id: str, body: bytes | None = None) -> bool:
+        """In --workers mode, pass a request for another worker's battle on to that worker"""
+        owner = CLUSTER.owner(battle_id) if CLUSTER else None
+        if owner is None:
+            return False
+        try:
+            code, payload = CLUSTER.forward(owner, self.command, self.path, body,
+                                            self.headers.get("Content-Type"))
+        except (OSError, http.client.HTTPException):
+            code, payload = 502, b'{"error": "worker_unavailable"}'
+        self._send_bytes(code, payload)
+        return True
+
+    def _params(self) -> dict[str, str]:
+        # Keep blanks: a client echoes map= before it has been placed on a map
+        return dict(parse_qsl(urlsplit(self.path).query, keep_blank_values=True))
+
+    @staticmethod
+    def _timeout(params: dict[str, str], limit: float) -> float:
+        """Long-poll timeout from the query, at most `limit`. ValueError unless it is a finite number >= 0"""
+        timeout = float(params.get("timeout", limit))
+        if not math.isfinite(timeout) or timeout < 0:
+            raise ValueError(f"bad timeout: {timeout}")
+        return min(timeout, limit)
+
+    @staticmethod
+    def _pending_battle(player_id: int) -> dict:
+        return BATTLE_HANDLER.pending_battle(player_id)
+
+    @staticmethod
+    def _area(params: dict[str, str]) -> Area:
+        """ValueError for a map that isn't a string (a /batch op can send any JSON) or bad coordinates"""
+        if not isinstance(params["map"], str):
+            raise ValueError(f"bad map: {params['map']!r}")
+        return Area(params["map"], Handler._finite(params.get("x", 0)), Handler._finite(params.get("y", 0)),
+                    Handler._radius(params, DEFAULT_AOI_RADIUS))
+
+    @staticmethod
+    def _radius(params: dict[str, str], default: float) -> float:
+        """Area-of-interest radius from the query, clamped to MAX_AOI_RADIUS"""
+        radius = Handler._finite(params.get("radius", default))
+        if radius < 0:
+            raise ValueError(f"bad radius: {radius}")
+        return min(radius, MAX_AOI_RADIUS)
+
+    @staticmethod
+    def _entries(value: object) -> list[dict] | None:
+        """A party's monsters or items: a list of JSON objects, or None. ValueError for anything else"""
+        if value is None:
+            return None
+        if not isinstance(value, list) or not all(isinstance(entry, dict) for entry in value):
+            raise ValueError(f"expected a list of objects, got {type(value).__name__}")
+        return value
+
+    @staticmethod
+    def _finite(value: object) -> float:
+        """float(value), ValueError for NaN and infinities (they break the spatial index)"""
+        number = float(value)
+        if not math.isfinite(number):
+            raise ValueError(f"not a finite number: {value}")
+        return number
+
     # Utility for JSON responses
+    def _reply(self, code: int, payload: object) -> None:
+        if isinstance(payload, bytes):
+            self._send_bytes(code, payload)
+        else:
+            self._json(code, payload)
+
     def _json(self, code: int, obj: object) -> None:
-        data = json.dumps(obj).encode("utf-8")
+        self._send_bytes(code, json.dumps(obj).encode("utf-8"))
+
+    def _send_bytes(self, code: int, data: bytes) -> None:
         self.send_response(code)
         self.send_header("Content-Type", "application/json")
         self.send_header("Content-Length", str(len(data)))
         self.end_headers()
         self.wfile.write(data)
 
+        route = urlsplit(self.path).path
+        METRICS.observe(route if route in ROUTES else "other", code,
+                        time.perf_counter() - self._started, len(data))
+
+class SingleThreadedHandler(Handler):
+    # A kept-alive connection would hold the only request thread, close after each response
+    protocol_version = "HTTP/1.0"
+
+def open_journal(directory: str) -> Journal:
+    """Restore players and battles from `directory`, then record every change there"""
+    journal = Journal(directory, lambda: {**PLAYER_HANDLER.export_state(), **BATTLE_HANDLER.export_state()})
+    state, records = journal.recover()
+    if state:
+        PLAYER_HANDLER.restore(state)
+        BATTLE_HANDLER.restore(state)
+    for kind, record in records:
+        handler = BATTLE_HANDLER if kind.startswith("battle") else PLAYER_HANDLER
+        handler.apply(kind, record)
+    PLAYER_HANDLER.journal = journal
+    BATTLE_HANDLER.journal = journal
+    journal.start()
+    return journal
+
+def start_worker(worker: cluster.Worker) -> None:
+    """Point the request handlers at the shared state, in each --workers process"""
+    global PLAYER_HANDLER, BATTLE_HANDLER, MAP_TABLE, CLUSTER
+    PLAYER_HANDLER = worker.players
+    BATTLE_HANDLER = worker.battles
+    MAP_TABLE = worker.maps
+    CLUSTER = worker
+    register_metrics()
+
+def make_server(host: str = "0.0.0.0", port: int = PORT, threaded: bool = True) -> HTTPServer:
+    """Build the HTTP server. Threaded mode serves each connection on its own thread."""
+    if threaded:
+        return ThreadingHTTPServer((host, port), Handler)
+    return HTTPServer((host, port), SingleThreadedHandler)
+
 if __name__ == "__main__":
-    print(f"[Server] Running on localhost with port {PORT}")
-    HTTPServer(("0.0.0.0", PORT), Handler).serve_forever()
+    parser = argparse.ArgumentParser(description="Monster Go online server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--single-threaded", action="store_true",
+                        help="handle one request at a time (legacy HTTPServer)")
+    parser.add_argument("--quiet", action="store_true", help="disable per-request access logs")
+    parser.add_argument("--verbose", action="store_true", help="print every battle turn")
+    parser.add_argument("--journal", metavar="DIR",
+                        help="keep players and battles across restarts in an append-only journal in DIR")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="serve from this many processes sharing one port (Linux/macOS)")
+    args = parser.parse_args()
+    if args.workers > 1 and (args.journal or args.single_threaded):
+        parser.error("--workers cannot be combined with --journal or --single-threaded")
+
+    battleHandler.VERBOSE = args.verbose
+
+    if args.quiet:
+        Handler.log_message = lambda self, fmt, *a: None  # Inherited by SingleThreadedHandler
+
+    journal = None
+    if args.journal:
+        started = time.perf_counter()
+        journal = open_journal(args.journal)
+        print(f"[Server] Restored {PLAYER_HANDLER.player_count()} players and "
+              f"{BATTLE_HANDLER.get_stats()['live']} battles from {args.journal} "
+              f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        # Stopped by a supervisor: still write the final snapshot
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    if args.workers > 1:
+        print(f"[Server] Running on {args.host} with port {args.port} ({args.workers} worker processes)")
+        # Stopped by a supervisor: still stop the workers and free the shared memory
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        cluster.serve(args.host, args.port, args.workers, Handler, start_worker, MAP_NAMES)
+        sys.exit(0)
+
+    mode = "single-threaded" if args.single_threaded else "threaded"
+    print(f"[Server] Running on {args.host} with port {args.port} ({mode})")
+    try:
+        make_server(args.host, args.port, threaded=not args.single_threaded).serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if journal:
+            journal.close()
@@ -1,9 +1,10 @@
 import threading
 import time
 import uuid
-import copy
+import random
+import math
 from dataclasses import dataclass, field
-from typing import Dict, Optional, Literal
+from typing import Callable, Dict, Optional, Literal
 from enum import Enum
 import sys
 import os
@@ -11,8 +12,22 @@ import os
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.utils.battle_calculator import calculate_damage, use_item_in_battle
+from server.metrics import TimedLock, LockStats, SharedLockStats
+from server.journal import Journal
 
 BATTLE_TIMEOUT = 30.0  # 30 seconds timeout
+REAP_INTERVAL = 5.0     # How often the reaper looks for battles to drop
+FINISHED_TTL = 60.0     # Finished/timed out battles stay this long so both players can read the result
+IDLE_TTL = 300.0        # Battles in any other state are dropped after this long without activity
+VERBOSE = False  # Per-turn debug prints, off by default: they run under the battle's lock
+
+
+BATTLE_LOCK_STATS = SharedLockStats()  # Wait time on the per-battle locks, all battles together
+
+
+def _log(message: str) -> None:
+    if VERBOSE:
+        print(message)
 
 
 class BattleStatus(Enum):
@@ -49,17 +64,98 @@ class Battle:
     last_update: float = field(default_factory=time.monotonic)
     last_result: Optional[dict] = None  # Store last turn result
     winner: Optional[int] = None
+    last_changes: dict = field(default_factory=dict)  # Monsters/items changed by the last turn
+    removed: bool = False  # Set by delete_battle
+    # Guards everything above, notified whenever the turn or status changes
+    lock: threading.Condition = field(default_factory=lambda: threading.Condition(TimedLock(BATTLE_LOCK_STATS)),
+                                      repr=False, compare=False)
 
 
 class BattleHandler:
-    _lock: threading.Lock
+    _lock: TimedLock  # Guards only the battles/player_battles maps, each Battle has its own lock
     battles: Dict[str, Battle]
     player_battles: Dict[int, str]  # player_id -> battle_id
+    _on_change: Callable[[], None] | None  # Called (without the lock) when a player joins or leaves a battle
+    _created: int  # Counters for get_stats()
+    _deleted: int
+    _reaped: int
+    _turns: int
+    journal: Journal | None  # Battle creations, turns and removals are recorded here when set
     
-    def __init__(self):
-        self._lock = threading.Lock()
+    def __init__(self, on_change: Callable[[], None] | None = None, *,
+                 finished_ttl: float = FINISHED_TTL, idle_ttl: float = IDLE_TTL,
+                 reap_interval: float = REAP_INTERVAL):
+        self._lock = TimedLock()
+        self._stop_event = threading.Event()
+        self._thread = None
         self.battles = {}
         self.player_battles = {}
+        self._on_change = on_change
+        self._finished_ttl = finished_ttl
+        self._idle_ttl = idle_ttl
+        self._reap_interval = reap_interval
+        self._created = 0
+        self._deleted = 0
+        self._reaped = 0
+        self._turns = 0
+        self.journal = None
+
+    def _notify(self) -> None:
+        if self._on_change:
+            self._on_change()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._reaper, name="BattleReaper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def _reaper(self) -> None:
+        while not self._stop_event.wait(self._reap_interval):
+            self.reap()
+
+    def reap(self) -> int:
+        """Time out idle battles and drop the ones nobody deleted. Returns how many were dropped."""
+        now = time.monotonic()
+        with self._lock:
+            battles = list(self.battles.values())
+
+        expired = []
+        for battle in battles:
+            with battle.lock:
+                self.check_timeout(battle)
+                ended = battle.status in (BattleStatus.FINISHED, BattleStatus.TIMEOUT)
+                ttl = self._finished_ttl if ended else self._idle_ttl
+                if now - battle.last_update >= ttl:
+                    expired.append(battle.battle_id)
+
+        reaped = sum(1 for battle_id in expired if self._remove(battle_id))
+        if reaped:
+            with self._lock:
+                self._reaped += reaped
+            _log(f"[SERVER] Reaped {reaped} battles")
+            self._notify()
+        return reaped
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "live": len(self.battles),
+                "created": self._created,
+                "deleted": self._deleted,
+                "reaped": self._reaped,
+                "turns": self._turns,
+            }
+
+    @property
+    def lock_stats(self) -> LockStats:
+        return self._lock.stats
     
     # ------------------------------------------------------------------
     # Battle Management
@@ -68,32 +164,139 @@ class BattleHandler:
     def create_battle(self, player1_id: int, player2_id: int, 
                      player1_data: dict, player2_data: dict) -> str:
         """Create a new battle between two players"""
+        # Validate that both players have monsters
+        p1_monsters = player1_data.get("monsters", [])
+        p2_monsters = player2_data.get("monsters", [])
+        
+        if not p1_monsters or not p2_monsters:
+            raise ValueError("Both players must have at least one monster")
+        
+        battle_id = self._new_battle_id()
+        
+        battle = Battle(
+            battle_id=battle_id,
+            player1_id=player1_id,
+            player2_id=player2_id,
+            player1_monsters=self._battle_copy(p1_monsters),
+            player2_monsters=self._battle_copy(p2_monsters),
+            player1_items=self._battle_copy(player1_data.get("items", [])),
+            player2_items=self._battle_copy(player2_data.get("items", [])),
+        )
+        
         with self._lock:
-            # Validate that both players have monsters
-            p1_monsters = player1_data.get("monsters", [])
-            p2_monsters = player2_data.get("monsters", [])
-            
-            if not p1_monsters or not p2_monsters:
-                raise ValueError("Both players must have at least one monster")
-            
-            battle_id = str(uuid.uuid4())
-            
-            battle = Battle(
-                battle_id=battle_id,
-                player1_id=player1_id,
-                player2_id=player2_id,
-                player1_monsters=copy.deepcopy(p1_monsters),
-                player2_monsters=copy.deepcopy(p2_monsters),
-                player1_items=copy.deepcopy(player1_data.get("items", [])),
-                player2_items=copy.deepcopy(player2_data.get("items", [])),
-            )
-            
+            self._created += 1
             self.battles[battle_id] = battle
             self.player_battles[player1_id] = battle_id
             self.player_battles[player2_id] = battle_id
+            self._journal("battle_created", battle)
             
-            return battle_id
+        self._notify()
+        return battle_id
     
+    def _new_battle_id(self) -> str:
+        return str(uuid.uuid4())
+
+    @staticmethod
+    def _battle_copy(entries) -> list[dict]:
+        """
+        The battle's own copy of a party list. A turn only ever assigns top-level keys
+        (hp, attack_boost, defense_boost, count), so one dict per entry is enough and
+        nested data like moves stays shared with the player's party snapshot.
+        """
+        return [dict(entry) for entry in entries]
+    
+    # ------------------------------------------------------------------
+    # Journal
+    # ------------------------------------------------------------------
+
+    def _journal(self, kind: str, battle: Battle) -> None:
+        """Queue a record of the battle - called under the lock guarding the change, so records keep their order"""
+        if self.journal is not None:
+            self.journal.append(kind, self._battle_record(battle))
+
+    @staticmethod
+    def _battle_record(battle: Battle) -> dict:
+        """Everything needed to rebuild a battle - MUST be called with the battle's lock held"""
+        def action(a: Optional[BattleAction]) -> Optional[dict]:
+            return {"player_id": a.player_id, "action_type": a.action_type, "data": a.data} if a else None
+        return {
+            "battle_id": battle.battle_id,
+            "player1_id": battle.player1_id,
+            "player2_id": battle.player2_id,
+            # Copies: the record is encoded later, on the journal's thread
+            "player1_monsters": [dict(m) for m in battle.player1_monsters],
+            "player2_monsters": [dict(m) for m in battle.player2_monsters],
+            "player1_items": [dict(i) for i in battle.player1_items],
+            "player2_items": [dict(i) for i in battle.player2_items],
+            "player1_current_monster": battle.player1_current_monster,
+            "player2_current_monster": battle.player2_current_monster,
+            "player1_action": action(battle.player1_action),
+            "player2_action": action(battle.player2_action),
+            "status": battle.status.value,
+            "turn": battle.turn,
+            "last_result": battle.last_result,
+            "winner": battle.winner,
+            "last_changes": battle.last_changes,
+        }
+
+    @staticmethod
+    def _battle_from_record(d: dict) -> Battle:
+        """Inverse of _battle_record. The idle and turn timers restart from now."""
+        def action(a: Optional[dict]) -> Optional[BattleAction]:
+            return BattleAction(a["player_id"], a["action_type"], a["data"], time.monotonic()) if a else None
+        return Battle(
+            battle_id=d["battle_id"],
+            player1_id=d["player1_id"],
+            player2_id=d["player2_id"],
+            player1_monsters=d["player1_monsters"],
+            player2_monsters=d["player2_monsters"],
+            player1_items=d["player1_items"],
+            player2_items=d["player2_items"],
+            player1_current_monster=d["player1_current_monster"],
+            player2_current_monster=d["player2_current_monster"],
+            player1_action=action(d["player1_action"]),
+            player2_action=action(d["player2_action"]),
+            status=BattleStatus(d["status"]),
+            turn=d["turn"],
+            last_result=d["last_result"],
+            winner=d["winner"],
+            last_changes=d["last_changes"],
+        )
+
+    def export_state(self) -> dict:
+        """Every live battle and the player -> battle map, for a journal snapshot"""
+        with self._lock:
+            battles = list(self.battles.values())
+            player_battles = dict(self.player_battles)
+        records = []
+        for battle in battles:
+            with battle.lock:
+                records.append(self._battle_record(battle))
+        return {"battles": records, "player_battles": {str(pid): bid for pid, bid in player_battles.items()}}
+
+    def restore(self, state: dict) -> None:
+        with self._lock:
+            for d in state.get("battles", []):
+                self.battles[d["battle_id"]] = self._battle_from_record(d)
+            for pid, battle_id in state.get("player_battles", {}).items():
+                if battle_id in self.battles:
+                    self.player_battles[int(pid)] = battle_id
+
+    def apply(self, kind: str, record: dict) -> None:
+        """Replay one journal record on top of a restored snapshot"""
+        battle_id = record["battle_id"]
+        if kind == "battle_removed":
+            self._remove(battle_id)
+            return
+        battle = self._battle_from_record(record)
+        with self._lock:
+            if kind == "battle_created":
+                self.player_battles[battle.player1_id] = battle_id
+                self.player_battles[battle.player2_id] = battle_id
+            elif battle_id not in self.battles:
+                return
+            self.battles[battle_id] = battle
+
     def get_battle(self, battle_id: str) -> Optional[Battle]:
         """Get battle by ID"""
         with self._lock:
@@ -107,12 +310,26 @@ class BattleHandler:
                 return self.battles.get(battle_id)
             return None
     
+    def pending_battle(self, player_id: int) -> dict:
+        """The player's current battle as reported by /battle/check"""
+        battle = self.get_player_battle(player_id)
+        if not battle:
+            return {"has_battle": False}
+        return {
+            "has_battle": True,
+            "battle_id": battle.battle_id,
+            "opponent_id": battle.player1_id if player_id == battle.player2_id else battle.player2_id
+        }
+    
     def submit_action(self, battle_id: str, player_id: int, 
                      action_type: str, data: dict) -> bool:
         """Submit a player's action"""
-        with self._lock:
-            battle = self.battles.get(battle_id)
-            if not battle:
+        battle = self.get_battle(battle_id)
+        if not battle:
+            return False
+        
+        with battle.lock:
+            if battle.removed:
                 return False
             
             if battle.status != BattleStatus.WAITING_ACTIONS:
@@ -133,15 +350,45 @@ class BattleHandler:
                 return False
             
             # If both players submitted actions, process the turn
-            if battle.player1_action and battle.player2_action:
+            processed = battle.player1_action is not None and battle.player2_action is not None
+            if processed:
+                before = self._snapshot_state(battle)
                 self._process_turn(battle)
+                battle.last_changes = self._changes_since(battle, before)
+                battle.last_update = time.monotonic()
             
-            return True
+            self._journal("battle", battle)
+            battle.lock.notify_all()
+        
+        if processed:
+            with self._lock:
+                self._turns += 1
+        return True
+
+    @staticmethod
+    def _snapshot_state(battle: Battle) -> dict:
+        """The parts of monsters and items a turn can change"""
+        def monsters(ms):
+            return [(m.get("hp"), m.get("attack_boost"), m.get("defense_boost")) for m in ms]
+        return {
+            "player1_monsters": monsters(battle.player1_monsters),
+            "player2_monsters": monsters(battle.player2_monsters),
+            "player1_items": [i.get("count") for i in battle.player1_items],
+            "player2_items": [i.get("count") for i in battle.player2_items],
+        }
+
+    def _changes_since(self, battle: Battle, before: dict) -> dict:
+        """Index -> entry of every monster/item that differs from `before`"""
+        after = self._snapshot_state(battle)
+        changes = {}
+        for key, old in before.items():
+            current = getattr(battle, key)
+            changes[key] = {i: dict(current[i]) for i, state in enumerate(after[key])
+                            if i >= len(old) or state != old[i]}
+        return changes
     
     def _process_turn(self, battle: Battle):
-        """Process a turn of battle"""
-        import random
-        
+        """Process a turn of battle - MUST be called with the battle's lock held"""
         battle.status = BattleStatus.PROCESSING
         battle.turn += 1
         
@@ -214,7 +461,7 @@ class BattleHandler:
                     old_hp = defender["hp"]
                     defender["hp"] = max(0, defender["hp"] - damage)
                     messages.append(f"{defender['name']}: {old_hp} -> {defender['hp']} HP")
-                    print(f"[SERVER] {attacker['name']} used {move['name']}, dealt {damage} damage. {defender['name']}: {old_hp} -> {defender['hp']} HP")
+                    _log(f"[SERVER] {attacker['name']} used {move['name']}, dealt {damage} damage. {defender['name']}: {old_hp} -> {defender['hp']} HP")
                 else:
                     # Fallback: basic attack
                     damage = max(1, attacker.get("level", 10))
@@ -222,7 +469,7 @@ class BattleHandler:
                     defender["hp"] = max(0, defender["hp"] - damage)
                     messages.append(f"{attacker['name']} attacked for {damage} damage!")
                     messages.append(f"{defender['name']}: {old_hp} -> {defender['hp']} HP")
-                    print(f"[SERVER] {attacker['name']} basic attack: {damage} damage")
+                    _log(f"[SERVER] {attacker['name']} basic attack: {damage} damage")
                     
             elif action.action_type == "use_item":
                 item_name = action.data.get("item_name")
@@ -235,11 +482,11 @@ class BattleHandler:
                 new_index = action.data.get("pokemon_index")
                 monsters = battle.player1_monsters if player_num == 1 else battle.player2_monsters
                 
-                print(f"[SERVER] Player {player_num} switch action: new_index={new_index}, monsters count={len(monsters)}")
+                _log(f"[SERVER] Player {player_num} switch action: new_index={new_index}, monsters count={len(monsters)}")
                 
                 if new_index is not None and 0 <= new_index < len(monsters):
                     new_monster = monsters[new_index]
-                    print(f"[SERVER] Target monster: {new_monster['name']} HP={new_monster['hp']}")
+                    _log(f"[SERVER] Target monster: {new_monster['name']} HP={new_monster['hp']}")
                     
                     if new_monster["hp"] > 0:
                         # Update current monster index
@@ -249,16 +496,16 @@ class BattleHandler:
                         else:
                             battle.player2_current_monster = new_index
                         messages.append(f"Player {player_num} switched to {new_monster['name']}!")
-                        print(f"[SERVER] Player {player_num} switched from index {old_index} to {new_index} ({new_monster['name']})")
+                        _log(f"[SERVER] Player {player_num} switched from index {old_index} to {new_index} ({new_monster['name']})")
                         # Switch doesn't cause damage, skip damage check
                         skip_damage_check = True
                     else:
                         messages.append(f"Cannot switch to fainted {new_monster['name']}!")
-                        print(f"[SERVER] Switch failed: target pokemon fainted")
+                        _log(f"[SERVER] Switch failed: target pokemon fainted")
                         skip_damage_check = True  # Also skip for failed switch
                 else:
                     messages.append(f"Invalid pokemon switch!")
-                    print(f"[SERVER] Invalid switch: index {new_index} out of range (0-{len(monsters)-1})")
+                    _log(f"[SERVER] Invalid switch: index {new_index} out of range (0-{len(monsters)-1})")
                     skip_damage_check = True  # Also skip for invalid switch
             
             # Check if defender fainted (skip for switch/item actions)
@@ -279,7 +526,7 @@ class BattleHandler:
                         # Update reference to new monster
                         new_monster = battle.player2_monsters[battle.player2_current_monster]
                         messages.append(f"Player 2 sent out {new_monster['name']}!")
-                        print(f"[SERVER] P2 switched to {new_monster['name']}")
+                        _log(f"[SERVER] P2 switched to {new_monster['name']}")
                 else:  # P2 attacked, P1's monster fainted
                     battle.player1_current_monster = self._get_next_alive_monster(
                         battle.player1_monsters, battle.player1_current_monster)
@@ -293,7 +540,7 @@ class BattleHandler:
                         # Update reference to new monster
                         new_monster = battle.player1_monsters[battle.player1_current_monster]
                         messages.append(f"Player 1 sent out {new_monster['name']}!")
-                        print(f"[SERVER] P1 switched to {new_monster['name']}")
+                        _log(f"[SERVER] P1 switched to {new_monster['name']}")
         
         # Reset actions and prepare for next turn
         battle.player1_action = None
@@ -302,8 +549,8 @@ class BattleHandler:
         battle.last_update = time.monotonic()
         battle.last_result = {"messages": messages}
         
-        print(f"[SERVER] Turn {battle.turn} complete. P1 current monster: index {battle.player1_current_monster}, P2 current monster: index {battle.player2_current_monster}")
-        print(f"[SERVER] Turn result messages: {messages}")
+        _log(f"[SERVER] Turn {battle.turn} complete. P1 current monster: index {battle.player1_current_monster}, P2 current monster: index {battle.player2_current_monster}")
+        _log(f"[SERVER] Turn result messages: {messages}")
     
     def _calculate_damage(self, attacker: dict, defender: dict, move: dict) -> tuple[int, list[str]]:
         """Calculate damage using battle_calculator with type effectiveness"""
@@ -331,7 +578,7 @@ class BattleHandler:
                     
                     # Decrease item count
                     item["count"] -= 1
-                    print(f"[SERVER] Used {item_name}, remaining: {item['count']}")
+                    _log(f"[SERVER] Used {item_name}, remaining: {item['count']}")
                 except Exception as e:
                     print(f"[SERVER ERROR] use_item_in_battle failed: {e}")
                     # Fallback: simple heal
@@ -366,12 +613,8 @@ class BattleHandler:
             "finished": battle.status == BattleStatus.FINISHED
         }
     
-    def check_timeout(self, battle_id: str) -> bool:
-        """Check if battle has timed out - MUST be called with lock already held"""
-        battle = self.battles.get(battle_id)
-        if not battle:
-            return False
-        
+    def check_timeout(self, battle: Battle) -> bool:
+        """Check if battle has timed out - MUST be called with the battle's lock held"""
         if battle.status != BattleStatus.WAITING_ACTIONS:
             return False
         
@@ -385,70 +628,134 @@ class BattleHandler:
                 battle.winner = battle.player1_id
                 messages = [f"Player {battle.player2_id} timed out!", f"Player {battle.player1_id} wins!"]
             
-                battle.status = BattleStatus.TIMEOUT
-                battle.result = self._create_result(battle, messages)
-                return True
-            
-            return False
+            battle.status = BattleStatus.TIMEOUT
+            battle.last_result = self._create_result(battle, messages)
+            battle.last_update = time.monotonic()
+            self._journal("battle", battle)
+            battle.lock.notify_all()
+            return True
+        
+        return False
     
     def end_battle(self, battle_id: str) -> bool:
         """Mark battle as finished (don't delete immediately)"""
-        with self._lock:
-            battle = self.battles.get(battle_id)
-            if not battle:
-                return False
-            
+        battle = self.get_battle(battle_id)
+        if not battle:
+            return False
+        
+        with battle.lock:
             # Mark as finished instead of deleting
             battle.status = BattleStatus.FINISHED
-            print(f"[SERVER] Battle {battle_id} marked as FINISHED")
+            battle.last_update = time.monotonic()
+            _log(f"[SERVER] Battle {battle_id} marked as FINISHED")
+            self._journal("battle", battle)
+            battle.lock.notify_all()
             
-            return True
+        return True
     
     def delete_battle(self, battle_id: str) -> bool:
         """Permanently delete a battle (call after both players acknowledged)"""
+        if not self._remove(battle_id):
+            return False
+        with self._lock:
+            self._deleted += 1
+        _log(f"[SERVER] Battle {battle_id} permanently deleted")
+        self._notify()
+        return True
+
+    def _remove(self, battle_id: str) -> bool:
+        """Drop a battle and its player entries, waking anyone waiting on its next turn"""
         with self._lock:
-            battle = self.battles.get(battle_id)
+            battle = self.battles.pop(battle_id, None)
             if not battle:
                 return False
             
-            # Remove from player battles
-            if battle.player1_id in self.player_battles:
+            # Remove from player battles (unless a player already moved on to a newer battle)
+            if self.player_battles.get(battle.player1_id) == battle_id:
                 del self.player_battles[battle.player1_id]
-            if battle.player2_id in self.player_battles:
+            if self.player_battles.get(battle.player2_id) == battle_id:
                 del self.player_battles[battle.player2_id]
+            if self.journal is not None:
+                self.journal.append("battle_removed", {"battle_id": battle_id})
             
-            # Remove battle
-            del self.battles[battle_id]
-            print(f"[SERVER] Battle {battle_id} permanently deleted")
-            
-            return True
+        with battle.lock:
+            battle.removed = True
+            battle.lock.notify_all()
+        return True
     
     def get_battle_status(self, battle_id: str, player_id: int) -> Optional[dict]:
         """Get battle status for a player"""
-        with self._lock:
-            battle = self.battles.get(battle_id)
-            if not battle:
+        battle = self.get_battle(battle_id)
+        if not battle:
+            return None
+        
+        with battle.lock:
+            if battle.removed:
                 return None
             
             # Check timeout (only if not already finished)
             if battle.status != BattleStatus.FINISHED:
-                self.check_timeout(battle_id)
+                self.check_timeout(battle)
             
             # Return complete battle state (client expects full data)
-            return {
-                "battle_id": battle_id,
-                "player1_id": battle.player1_id,
-                "player2_id": battle.player2_id,
-                "player1_monsters": battle.player1_monsters,
-                "player2_monsters": battle.player2_monsters,
-                "player1_items": battle.player1_items,
-                "player2_items": battle.player2_items,
-                "turn_count": battle.turn,
-                "status": battle.status.value,
-                "winner": battle.winner,
-                "last_turn_result": battle.last_result or {},
-                "player1_current_monster": battle.player1_current_monster,
-                "player2_current_monster": battle.player2_current_monster,
-                "player1_action_submitted": battle.player1_action is not None,
-                "player2_action_submitted": battle.player2_action is not None
-            }
+            return self._status_dict(battle)
+
+    def wait_for_turn(self, battle_id: str, player_id: int, since_turn: int, timeout: float) -> Optional[dict]:
+        """
+        Long-poll version of get_battle_status: block until the battle is past `since_turn`,
+        has ended, or `timeout` passes. If the client is at most one turn behind, only the
+        monsters and items that changed since are returned under "changes", otherwise the full state.
+        """
+        if not math.isfinite(timeout):
+            # wait_for would spin on a NaN timeout
+            raise ValueError(f"timeout must be finite, got {timeout}")
+        battle = self.get_battle(battle_id)
+        if not battle:
+            return None
+
+        def ready() -> bool:
+            if battle.removed or battle.turn > since_turn:
+                return True
+            if battle.status == BattleStatus.WAITING_ACTIONS:
+                self.check_timeout(battle)
+            return battle.status in (BattleStatus.FINISHED, BattleStatus.TIMEOUT)
+
+        with battle.lock:
+            battle.lock.wait_for(ready, timeout)
+            if battle.removed:
+                return None
+            if battle.turn == since_turn:
+                changes = {}
+            elif battle.turn == since_turn + 1:
+                changes = battle.last_changes
+            else:
+                return self._status_dict(battle)
+
+            status = self._status_dict(battle, with_lists=False)
+            status["changes"] = changes
+            return status
+
+    def _status_dict(self, battle: Battle, with_lists: bool = True) -> dict:
+        """Battle state as sent to clients - MUST be called with the battle's lock held"""
+        status = {
+            "battle_id": battle.battle_id,
+            "player1_id": battle.player1_id,
+            "player2_id": battle.player2_id,
+            "turn_count": battle.turn,
+            "status": battle.status.value,
+            "winner": battle.winner,
+            "last_turn_result": battle.last_result or {},
+            "player1_current_monster": battle.player1_current_monster,
+            "player2_current_monster": battle.player2_current_monster,
+            "player1_action_submitted": battle.player1_action is not None,
+            "player2_action_submitted": battle.player2_action is not None
+        }
+        if with_lists:
+            status.update({
+                # Copies: the response is encoded after the lock is released
+                "player1_monsters": [dict(m) for m in battle.player1_monsters],
+                "player2_monsters": [dict(m) for m in battle.player2_monsters],
+                "player1_items": [dict(i) for i in battle.player1_items],
+                "player2_items": [dict(i) for i in battle.player2_items],
+            })
+        return status
@@ -0,0 +1,660 @@
+"""
+Multi-process mode for server.py (--workers N).
+
+The parent opens the listening socket and forks N workers that all accept on
+it, so the kernel spreads connections over the processes and each one runs
+Python on its own core.
+
+- Players live in a fixed-size table in shared memory (SharedPlayerHandler),
+  guarded by one multiprocessing lock, and every worker reads and writes it
+  directly. Next to it are a ring of the latest changed rows, so a delta reads
+  only those, and a queue of free rows, for registration and expiry. A Condition cannot wake threads in other processes, so waiting
+  stream requests poll the table's change counter instead, with back-off.
+  Battles starting and ending move the counter too.
+- A battle is owned by the worker that created it and its id starts with
+  "w<worker>-". Battle requests that reach another worker are forwarded to the
+  owner over a private loopback port (sticky routing by battle id). Which
+  battle a player is in is mirrored into the player table, so any worker can
+  answer /battle/check.
+- Map names for the binary position format are interned in the same shared
+  memory block (SharedMapTable).
+
+Needs fork, so Linux or macOS. Not combinable with --journal or --single-threaded.
+"""
+
+import heapq
+import http.client
+import json
+import math
+import multiprocessing
+import multiprocessing.connection
+import random
+import signal
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import shared_memory
+from typing import Callable, Optional
+
+from server.battleHandler import BattleHandler
+from server.metrics import LockStats, TimedLock
+from server.playerHandler import Area, Party, SPRITES, TIMEOUT_TIME, CHECK_INTERVAL_TIME
+from src.utils import wire
+
+MAX_PLAYERS = 1024       # Rows in the shared player table
+PARTY_SIZE = 16 * 1024   # Bytes of JSON per player for monsters and items
+MAX_MAPS = wire.MAX_MAPS           # Map names in the shared map table
+MAP_NAME_SIZE = wire.MAX_MAP_NAME  # Bytes per map name
+POLL_INTERVAL = 0.01     # How soon a waiting stream first looks at the change counter again
+MAX_POLL_INTERVAL = 0.1  # Doubling up to this while nothing changes
+FORWARD_TIMEOUT = 30.0   # Longer than the longest /battle/status long-poll
+
+_HEADER = struct.Struct("<QQqqq")        # seq, delta floor, next player id, rows in use, map count
+_FREE_HEAD = struct.Struct("<qq")        # free slot queue: slots taken so far, slots returned so far
+_CHANGE = struct.Struct("<qq")           # seq, slot (FREE for changes without a row)
+_SLOT = struct.Struct("<h")
+_ROW = struct.Struct("<qddHBBdQq48sq")   # see the R_* indices below
+_PARTY_HEAD = struct.Struct("<qI")       # version, JSON length
+R_ID, R_X, R_Y, R_MAP, R_DIR, R_SPRITE, R_MOVED, R_SEQ, R_OPPONENT, R_BATTLE, R_REMOVED = range(11)
+FREE = -1
+
+FREE_HEAD_OFFSET = _HEADER.size
+MAPS_OFFSET = 64
+ROWS_OFFSET = MAPS_OFFSET + MAX_MAPS * MAP_NAME_SIZE
+PARTY_SLOT = _PARTY_HEAD.size + PARTY_SIZE
+PARTIES_OFFSET = ROWS_OFFSET + MAX_PLAYERS * _ROW.size
+CHANGES_OFFSET = PARTIES_OFFSET + MAX_PLAYERS * PARTY_SLOT
+CHANGE_RING = MAX_PLAYERS  # Deltas further behind than this read every row, that's no more work
+FREE_OFFSET = CHANGES_OFFSET + CHANGE_RING * _CHANGE.size
+TOTAL_SIZE = FREE_OFFSET + MAX_PLAYERS * _SLOT.size
+
+_DIRECTION_INDEX = {name: i for i, name in enumerate(wire.DIRECTIONS)}
+
+
+class SharedState:
+    """The shared memory block and the lock guarding it, created by the parent before forking"""
+
+    def __init__(self, ctx, map_names: list[str] = ()):
+        if len(map_names) > MAX_MAPS:
+            raise ValueError(f"more than {MAX_MAPS} map names")
+        self.shm = shared_memory.SharedMemory(create=True, size=TOTAL_SIZE)
+        self.buf = self.shm.buf
+        self.lock = ctx.Lock()
+        rows = bytes(_ROW.pack(FREE, 0.0, 0.0, 0, 0, 0, 0.0, 0, FREE, b"", FREE))
+        for slot in range(MAX_PLAYERS):
+            off = ROWS_OFFSET + slot * _ROW.size
+            self.buf[off:off + _ROW.size] = rows
+            _SLOT.pack_into(self.buf, FREE_OFFSET + slot * _SLOT.size, slot)
+        _FREE_HEAD.pack_into(self.buf, FREE_HEAD_OFFSET, 0, MAX_PLAYERS)
+        # The server's own maps, so clients cannot crowd them out of the table
+        for idx, name in enumerate(map_names):
+            encoded = name.encode("utf-8")
+            if len(encoded) > MAP_NAME_SIZE:
+                raise ValueError(f"map name longer than {MAP_NAME_SIZE} bytes: {name!r}")
+            off = MAPS_OFFSET + idx * MAP_NAME_SIZE
+            self.buf[off:off + MAP_NAME_SIZE] = encoded.ljust(MAP_NAME_SIZE, b"\0")
+        # seq starts above 0 for the same reason as PlayerHandler._seq
+        _HEADER.pack_into(self.buf, 0, 1, 0, 0, 0, len(map_names))
+
+    def close(self) -> None:
+        self.buf.release()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SharedMapTable:
+    """
+    wire.MapTable over shared memory, so every worker hands out the same indices.
+    Same limits and errors: ValueError for a name too long, RuntimeError once full.
+    """
+
+    def __init__(self, state: SharedState):
+        self._state = state
+        self._names: list[str] = []
+        self._indices: dict[str, int] = {}
+        self._cache_lock = threading.Lock()  # Guards the local copy only
+
+    def _load(self) -> None:
+        """
+        Pick up names added by other workers. Safe without the shared lock: names are
+        only appended and the count is raised after the name is written.
+        """
+        buf = self._state.buf
+        with self._cache_lock:
+            count = _HEADER.unpack_from(buf, 0)[4]
+            for idx in range(len(self._names), count):
+                off = MAPS_OFFSET + idx * MAP_NAME_SIZE
+                name = bytes(buf[off:off + MAP_NAME_SIZE]).rstrip(b"\0").decode("utf-8")
+                self._names.append(name)
+                self._indices[name] = idx
+
+    def index_of(self, name: str) -> int:
+        idx = self._indices.get(name)
+        if idx is not None:
+            return idx
+        encoded = name.encode("utf-8")
+        if len(encoded) > MAP_NAME_SIZE:
+            raise ValueError(f"map name longer than {MAP_NAME_SIZE} bytes")
+        with self._state.lock:
+            self._load()
+            idx = self._indices.get(name)
+            if idx is None:
+                buf = self._state.buf
+                seq, floor, next_id, high, count = _HEADER.unpack_from(buf, 0)
+                if count >= MAX_MAPS:
+                    raise RuntimeError("map table full")
+                off = MAPS_OFFSET + count * MAP_NAME_SIZE
+                buf[off:off + MAP_NAME_SIZE] = encoded.ljust(MAP_NAME_SIZE, b"\0")
+                _HEADER.pack_into(buf, 0, seq, floor, next_id, high, count + 1)
+                self._load()
+                idx = self._indices[name]
+            return idx
+
+    def name_of(self, index: int) -> str | None:
+        if not 0 <= index < len(self._names):
+            self._load()
+        return self._names[index] if 0 <= index < len(self._names) else None
+
+
+class SharedPlayerHandler:
+    """
+    The part of PlayerHandler's API that server.py uses, over a shared memory table.
+    A player's row is `id % MAX_PLAYERS`; registration takes the row freed longest ago
+    and skips ids up to one that maps to it. A removed player leaves a tombstone
+    (R_REMOVED) so streams can report it; when the row is reused, streams older than the
+    tombstone get a full snapshot instead.
+    """
+
+    def __init__(self, state: SharedState, maps: SharedMapTable, *, expire: bool,
+                 timeout_seconds: float = TIMEOUT_TIME, check_interval_seconds: float = CHECK_INTERVAL_TIME):
+        self._state = state
+        self._buf = state.buf
+        self._maps = maps
+        self._lock = TimedLock(lock=state.lock)
+        self._expire = expire  # Only one worker runs the expiry thread
+        self._timeout = timeout_seconds
+        self._check_interval = check_interval_seconds
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._snapshot = (-1, b"")
+        # Expiry index of the worker that expires players, like PlayerHandler._expiry but
+        # lazy: an entry is checked against the row when its deadline comes up
+        self._expiry: list[tuple[float, int, int]] = []  # (deadline, slot, player id)
+        self._tracked: dict[int, int] = {}  # Slot -> player id with an entry in _expiry
+        self._taken_seen: int | None = None  # Free queue position the index has caught up with
+
+    @property
+    def lock_stats(self) -> LockStats:
+        return self._lock.stats
+
+    # Threading
+    def start(self) -> None:
+        if not self._expire or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._cleaner, name="PlayerCleaner", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def _cleaner(self) -> None:
+        while not self._stop_event.wait(self._check_interval):
+            self.expire()
+
+    # Table access - MUST be called with the lock held
+    def _header(self) -> tuple:
+        return _HEADER.unpack_from(self._buf, 0)
+
+    def _row(self, slot: int) -> tuple:
+        return _ROW.unpack_from(self._buf, ROWS_OFFSET + slot * _ROW.size)
+
+    def _write_row(self, slot: int, row: tuple) -> None:
+        _ROW.pack_into(self._buf, ROWS_OFFSET + slot * _ROW.size, *row)
+
+    def _bump(self, slot: int = FREE) -> int:
+        """Next change sequence number, recorded in the change ring with the row it changed"""
+        seq, floor, next_id, high, count = self._header()
+        seq += 1
+        _HEADER.pack_into(self._buf, 0, seq, floor, next_id, high, count)
+        _CHANGE.pack_into(self._buf, CHANGES_OFFSET + seq % CHANGE_RING * _CHANGE.size, seq, slot)
+        return seq
+
+    def _changed_slots(self, since: int, seq: int) -> set[int] | None:
+        """Rows changed after `since`, None when the ring no longer goes back that far"""
+        if seq - since > CHANGE_RING:
+            return None
+        slots = set()
+        for n in range(since + 1, seq + 1):
+            entry, slot = _CHANGE.unpack_from(self._buf, CHANGES_OFFSET + n % CHANGE_RING * _CHANGE.size)
+            if entry != n:
+                return None
+            if slot != FREE:
+                slots.add(slot)
+        return slots
+
+    def _free_head(self) -> tuple[int, int]:
+        return _FREE_HEAD.unpack_from(self._buf, FREE_HEAD_OFFSET)
+
+    def _free_slot(self, position: int) -> int:
+        return _SLOT.unpack_from(self._buf, FREE_OFFSET + position % MAX_PLAYERS * _SLOT.size)[0]
+
+    def _take_slot(self) -> int:
+        """Row freed longest ago, RuntimeError when every row is taken"""
+        taken, returned = self._free_head()
+        if taken == returned:
+            raise RuntimeError("player table full")
+        _FREE_HEAD.pack_into(self._buf, FREE_HEAD_OFFSET, taken + 1, returned)
+        return self._free_slot(taken)
+
+    def _return_slot(self, slot: int) -> None:
+        taken, returned = self._free_head()
+        _SLOT.pack_into(self._buf, FREE_OFFSET + returned % MAX_PLAYERS * _SLOT.size, slot)
+        _FREE_HEAD.pack_into(self._buf, FREE_HEAD_OFFSET, taken, returned + 1)
+
+    def _live_row(self, pid: int) -> tuple | None:
+        row = self._row(pid % MAX_PLAYERS)
+        return row if row[R_ID] == pid else None
+
+    def _write_party(self, slot: int, version: int, data: bytes) -> None:
+        off = PARTIES_OFFSET + slot * PARTY_SLOT
+        _PARTY_HEAD.pack_into(self._buf, off, version, len(data))
+        start = off + _PARTY_HEAD.size
+        self._buf[start:start + len(data)] = data
+
+    def _read_party(self, slot: int) -> tuple[int, bytes]:
+        off = PARTIES_OFFSET + slot * PARTY_SLOT
+        version, length = _PARTY_HEAD.unpack_from(self._buf, off)
+        start = off + _PARTY_HEAD.size
+        return version, bytes(self._buf[start:start + length])
+
+    def _to_dict(self, row: tuple) -> dict:
+        return {
+            "id": row[R_ID],
+            "x": row[R_X],
+            "y": row[R_Y],
+            "map": self._maps.name_of(row[R_MAP]),
+            "t": round(row[R_MOVED], 3),
+            "Animation": [SPRITES[row[R_SPRITE]], wire.DIRECTIONS[row[R_DIR]].lower()],
+        }
+
+    def _rows(self) -> list[tuple]:
+        """Every row in use so far, copied out in one go: callers filter them after releasing the lock"""
+        high = self._header()[3]
+        return list(_ROW.iter_unpack(bytes(self._buf[ROWS_OFFSET:ROWS_OFFSET + high * _ROW.size])))
+
+    @staticmethod
+    def _encode_party(monsters, items) -> bytes:
+        data = json.dumps({"monsters": list(monsters), "items": list(items)}).encode("utf-8")
+        if len(data) > PARTY_SIZE:
+            raise ValueError(f"party larger than {PARTY_SIZE} bytes")
+        return data
+
+    # API
+    def player_count(self) -> int:
+        with self._lock:
+            taken, returned = self._free_head()
+        return MAX_PLAYERS - (returned - taken)
+
+    def register(self) -> int:
+        """Raises RuntimeError when every row is taken"""
+        map_index = self._maps.index_of("")
+        with self._lock:
+            slot = self._take_slot()
+            row = self._row(slot)
+            seq = self._bump(slot)
+            _, floor, next_id, high, count = self._header()
+            pid = next_id + (slot - next_id) % MAX_PLAYERS
+            if row[R_REMOVED] != FREE:
+                # Streams from before this removal can no longer be told about it
+                floor = max(floor, row[R_SEQ])
+            _HEADER.pack_into(self._buf, 0, seq, floor, pid + 1, max(high, slot + 1), count)
+            self._write_row(slot, (pid, 0.0, 0.0, map_index, _DIRECTION_INDEX["DOWN"],
+                                   random.randrange(len(SPRITES)), time.monotonic(), seq, FREE, b"", FREE))
+            self._write_party(slot, 0, self._encode_party((), ()))
+            return pid
+
+    def update(self, pid: int, x: float, y: float, map_name: str, direction: str,
+               monsters: list = None, items: list = None) -> bool:
+        """
+        Raises what SharedMapTable.index_of raises for a map name it cannot intern,
+        and ValueError for a party that doesn't fit its row
+        """
+        map_index = self._maps.index_of(str(map_name))
+        dir_index = _DIRECTION_INDEX.get(str(direction).upper(), _DIRECTION_INDEX["NONE"])
+        x, y = float(x), float(y)
+        with self._lock:
+            row = self._live_row(pid)
+            if row is None:
+                return False
+            party = None
+            if monsters is not None or items is not None:
+                # Encoded first, so a party too large leaves the row untouched
+                version, data = self._read_party(pid % MAX_PLAYERS)
+                old = json.loads(data)
+                party = self._encode_party(monsters if monsters is not None else old["monsters"],
+                                           items if items is not None else old["items"])
+            moved = x != row[R_X] or y != row[R_Y] or map_index != row[R_MAP]
+            if moved or dir_index != row[R_DIR]:
+                row = list(row)
+                row[R_X], row[R_Y], row[R_MAP], row[R_DIR] = x, y, map_index, dir_index
+                if moved:
+                    row[R_MOVED] = time.monotonic()
+                row[R_SEQ] = self._bump(pid % MAX_PLAYERS)
+                self._write_row(pid % MAX_PLAYERS, row)
+            if party is not None:
+                self._write_party(pid % MAX_PLAYERS, version, party)
+            return True
+
+    def update_party(self, pid: int, monsters: list, items: list, version: int) -> bool:
+        """Raises ValueError for a party that doesn't fit its row"""
+        data = self._encode_party(monsters, items)
+        with self._lock:
+            if self._live_row(pid) is None:
+                return False
+            if version > self._read_party(pid % MAX_PLAYERS)[0]:
+                self._write_party(pid % MAX_PLAYERS, version, data)
+            return True
+
+    def get_party(self, pid: int) -> Optional[Party]:
+        with self._lock:
+            if self._live_row(pid) is None:
+                return None
+            version, data = self._read_party(pid % MAX_PLAYERS)
+        party = json.loads(data)
+        return Party(version, tuple(party["monsters"]), tuple(party["items"]))
+
+    def players_snapshot(self) -> bytes:
+        """`{"players": {...}}` as JSON bytes, cached per worker until the table changes"""
+        seq, data = self._snapshot
+        if seq == self._header()[0]:
+            return data
+        with self._lock:
+            seq = self._header()[0]
+            rows = self._rows()
+        players = {row[R_ID]: self._to_dict(row) for row in rows if row[R_ID] != FREE}
+        data = json.dumps({"players": players}).encode("utf-8")
+        self._snapshot = (seq, data)
+        return data
+
+    def players_near(self, area: Area) -> dict:
+        with self._lock:
+            rows = self._rows()
+        return {row[R_ID]: self._to_dict(row) for row in rows if row[R_ID] != FREE and self._in_area(area, row)}
+
+    def _in_area(self, area: Area | None, row: tuple) -> bool:
+        return area is None or area.contains(self._maps.name_of(row[R_MAP]), row[R_X], row[R_Y])
+
+    def expire(self, now: float | None = None) -> int:
+        """Drop players that haven't moved for `timeout_seconds`. Only called in one worker."""
+        if now is None:
+            now = time.monotonic()
+        removed = 0
+        with self._lock:
+            self._track_new_players()
+            while self._expiry and self._expiry[0][0] <= now:
+                _, slot, pid = heapq.heappop(self._expiry)
+                row = self._row(slot)
+                if row[R_ID] != pid:
+                    # Gone already, a new player in the row was tracked by itself
+                    if self._tracked.get(slot) == pid:
+                        del self._tracked[slot]
+                    continue
+                deadline = row[R_MOVED] + self._timeout
+                if deadline > now:
+                    # Moved since the entry was pushed
+                    heapq.heappush(self._expiry, (deadline, slot, pid))
+                    continue
+                self._write_row(slot, (FREE, 0.0, 0.0, 0, 0, 0, 0.0, self._bump(slot), FREE, b"", pid))
+                self._return_slot(slot)
+                self._tracked.pop(slot, None)
+                removed += 1
+        return removed
+
+    def _track_new_players(self) -> None:
+        """
+        Give players registered since the last call an expiry entry. Registrations read
+        the free queue, so the slots taken since then are still in it, unless so many
+        rows were freed meanwhile that they were overwritten: then look at every row.
+        """
+        taken, returned = self._free_head()
+        if self._taken_seen is None or returned > self._taken_seen + MAX_PLAYERS:
+            slots = range(self._header()[3])
+        else:
+            slots = [self._free_slot(position) for position in range(self._taken_seen, taken)]
+        self._taken_seen = taken
+        for slot in slots:
+            pid = self._row(slot)[R_ID]
+            if pid != FREE and self._tracked.get(slot) != pid:
+                self._tracked[slot] = pid
+                heapq.heappush(self._expiry, (self._row(slot)[R_MOVED] + self._timeout, slot, pid))
+
+    # Streams
+    def notify(self) -> None:
+        """Nothing to do: waiting streams poll the change counter"""
+
+    def _delta(self, since: int, area: Area | None) -> dict:
+        """Same result format as PlayerHandler._delta"""
+        with self._lock:
+            seq, floor = self._header()[:2]
+            full = since <= 0 or since < floor or since > seq
+            slots = None if full else self._changed_slots(since, seq)
+            rows = self._rows() if slots is None else [self._row(slot) for slot in slots]
+        changed = {}
+        removed = []
+        for row in rows:
+            if row[R_ID] != FREE:
+                if full or row[R_SEQ] > since:
+                    if self._in_area(area, row):
+                        changed[row[R_ID]] = self._to_dict(row)
+                    elif not full:
+                        # Left the area (or was never in it, the client ignores unknown ids)
+                        removed.append(row[R_ID])
+            elif not full and row[R_REMOVED] != FREE and row[R_SEQ] > since:
+                removed.append(row[R_REMOVED])
+        return {"seq": seq, "full": full, "players": changed, "removed": removed}
+
+    def _viewer_area(self, viewer: int, radius: float) -> Area | None:
+        with self._lock:
+            row = self._live_row(viewer)
+        if row is None:
+            return None
+        return Area(self._maps.name_of(row[R_MAP]), row[R_X], row[R_Y], radius)
+
+    def wait_for_delta(self, since: int, timeout: float, *, viewer: int | None = None,
+                       radius: float = 0.0, area: Area | None = None,
+                       until: Callable[[], bool] | None = None) -> dict:
+        """Same contract as PlayerHandler.wait_for_delta"""
+        if not math.isfinite(timeout):
+            raise ValueError(f"timeout must be finite, got {timeout}")
+        deadline = time.monotonic() + timeout
+        while True:
+            if viewer is not None and radius > 0:
+                current = self._viewer_area(viewer, radius)
+                if current and (area is None or area.drifted(current)):
+                    area = current
+                    since = 0
+            delta = self._delta(since, area)
+            remaining = deadline - time.monotonic()
+            if (delta["full"] or delta["players"] or delta["removed"] or remaining <= 0
+                    or (until is not None and until())):
+                delta["area"] = area.to_dict() if area else None
+                delta["time"] = round(time.monotonic(), 3)
+                return delta
+            # Reading the counter needs no lock. Everything until() looks at moves it too,
+            # so the lock is only taken again once it has changed
+            since = delta["seq"]
+            interval = POLL_INTERVAL
+            while self._header()[0] == since and remaining > 0:
+                time.sleep(min(interval, remaining))
+                interval = min(interval * 2, MAX_POLL_INTERVAL)
+                remaining = deadline - time.monotonic()
+
+    # Battles, written by the owning worker's ClusterBattleHandler
+    def set_battle(self, pid: int, battle_id: str, opponent_id: int) -> None:
+        with self._lock:
+            row = self._live_row(pid)
+            if row is not None:
+                row = list(row)
+                row[R_BATTLE], row[R_OPPONENT] = battle_id.encode("ascii"), opponent_id
+                self._write_row(pid % MAX_PLAYERS, row)
+                # No row changes for the streams, but waiting ones wake up and check until()
+                self._bump()
+
+    def clear_battle(self, pid: int, battle_id: str) -> None:
+        """Unless the player already moved on to a newer battle"""
+        with self._lock:
+            row = self._live_row(pid)
+            if row is not None and row[R_BATTLE].rstrip(b"\0") == battle_id.encode("ascii"):
+                row = list(row)
+                row[R_BATTLE], row[R_OPPONENT] = b"", FREE
+                self._write_row(pid % MAX_PLAYERS, row)
+                self._bump()
+
+    def pending_battle(self, pid: int) -> dict:
+        with self._lock:
+            row = self._live_row(pid)
+        battle_id = row[R_BATTLE].rstrip(b"\0").decode("ascii") if row else ""
+        if not battle_id:
+            return {"has_battle": False}
+        return {"has_battle": True, "battle_id": battle_id, "opponent_id": row[R_OPPONENT]}
+
+
+def battle_owner(battle_id: str) -> int | None:
+    """Worker index encoded in a cluster battle id, None for anything else"""
+    prefix, sep, _ = battle_id.partition("-")
+    if not sep or not prefix.startswith("w") or not prefix[1:].isdigit():
+        return None
+    return int(prefix[1:])
+
+
+class ClusterBattleHandler(BattleHandler):
+    """BattleHandler for one worker: prefixes its battle ids and mirrors players' battles into the shared table"""
+
+    def __init__(self, players: SharedPlayerHandler, worker: int, on_change: Callable[[], None] | None = None):
+        super().__init__(on_change)
+        self._players = players
+        self._prefix = f"w{worker}-"
+
+    def _new_battle_id(self) -> str:
+        return self._prefix + super()._new_battle_id()
+
+    def create_battle(self, player1_id: int, player2_id: int,
+                      player1_data: dict, player2_data: dict) -> str:
+        battle_id = super().create_battle(player1_id, player2_id, player1_data, player2_data)
+        self._players.set_battle(player1_id, battle_id, player2_id)
+        self._players.set_battle(player2_id, battle_id, player1_id)
+        return battle_id
+
+    def _remove(self, battle_id: str) -> bool:
+        battle = self.get_battle(battle_id)
+        if not super()._remove(battle_id):
+            return False
+        self._players.clear_battle(battle.player1_id, battle_id)
+        self._players.clear_battle(battle.player2_id, battle_id)
+        return True
+
+    def pending_battle(self, player_id: int) -> dict:
+        return self._players.pending_battle(player_id)
+
+
+class Worker:
+    """One worker process: its shared handlers and the way to reach the other workers"""
+
+    def __init__(self, index: int, ports: list[int], state: SharedState):
+        self.index = index
+        self.ports = ports
+        self.maps = SharedMapTable(state)
+        self.players = SharedPlayerHandler(state, self.maps, expire=index == 0)
+        self.battles = ClusterBattleHandler(self.players, index, on_change=self.players.notify)
+        self._local = threading.local()
+
+    def owner(self, battle_id: str) -> int | None:
+        """The worker a battle request must be forwarded to, None to handle it here"""
+        owner = battle_owner(battle_id)
+        if owner is None or owner == self.index or owner >= len(self.ports):
+            return None
+        return owner
+
+    def forward(self, owner: int, method: str, path: str, body: bytes | None,
+                content_type: str | None) -> tuple[int, bytes]:
+        """Replay a request on the owning worker over a kept-alive loopback connection"""
+        conns = self._local.__dict__.setdefault("conns", {})
+        headers = {"Content-Type": content_type} if content_type else {}
+        for attempt in range(2):
+            conn = conns.get(owner)
+            if conn is None:
+                conn = conns[owner] = http.client.HTTPConnection("127.0.0.1", self.ports[owner],
+                                                                 timeout=FORWARD_TIMEOUT)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                return resp.status, resp.read()
+            except (OSError, http.client.HTTPException):
+                # The kept-alive connection may have been closed by the owner, retry once on a new one
+                conn.close()
+                del conns[owner]
+                if attempt:
+                    raise
+
+
+def _listen(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+    return sock
+
+
+def _server_on(sock: socket.socket, handler: type[BaseHTTPRequestHandler]) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(sock.getsockname(), handler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = sock
+    return server
+
+
+def _run_worker(index: int, state: SharedState, public: socket.socket, private: socket.socket,
+                ports: list[int], handler: type[BaseHTTPRequestHandler], setup: Callable[[Worker], None]) -> None:
+    # Ctrl-C goes to the whole process group, the parent stops the workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    worker = Worker(index, ports, state)
+    worker.players.start()
+    worker.battles.start()
+    setup(worker)
+    threading.Thread(target=_server_on(private, handler).serve_forever, name="ForwardedRequests",
+                     daemon=True).start()
+    _server_on(public, handler).serve_forever()
+
+
+def serve(host: str, port: int, workers: int, handler: type[BaseHTTPRequestHandler],
+          setup: Callable[[Worker], None], map_names: list[str] = ()) -> None:
+    """
+    Run `workers` processes serving `handler` on one port until interrupted or a worker dies.
+    `setup` runs in each worker before it starts serving, to point the handler at the shared state.
+    `map_names` are interned up front, so they keep an index however many names clients send.
+    """
+    ctx = multiprocessing.get_context("fork")
+    state = SharedState(ctx, map_names)
+    public = _listen(host, port)
+    private = [_listen("127.0.0.1", 0) for _ in range(workers)]
+    ports = [sock.getsockname()[1] for sock in private]
+    procs = [ctx.Process(target=_run_worker, name=f"worker-{i}", daemon=True,
+                         args=(i, state, public, private[i], ports, handler, setup))
+             for i in range(workers)]
+    for proc in procs:
+        proc.start()
+    try:
+        multiprocessing.connection.wait([proc.sentinel for proc in procs])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.join(timeout=5.0)
+        state.close()
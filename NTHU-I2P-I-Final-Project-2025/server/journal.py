@@ -0,0 +1,135 @@
+import json
+import os
+import queue
+import threading
+import time
+from typing import Callable
+
+COMPACT_RECORDS = 10000  # Compact once the journal holds this many records
+COMPACT_INTERVAL = 30.0  # ...or this many seconds passed, so positions (not journaled) are saved too
+JOURNAL_FILE = "journal.log"
+SNAPSHOT_FILE = "snapshot.json"
+
+
+class Journal:
+    """
+    Append-only record of state changes, compacted into periodic snapshots.
+
+    `append()` only queues the record; a background thread numbers it, writes it
+    as one JSON line and flushes once the queue is drained. Records are upserts
+    ("this is now the state of X"), so replaying one whose effect is already in
+    the snapshot is harmless. A snapshot stores the number of the last record
+    written before it was taken, and recovery replays only the records after it.
+
+    Record dicts must not be modified after they are appended.
+    """
+
+    _queue: queue.Queue  # (kind, record), None to stop
+    _seq: int            # Number of the last record written
+    _written: int        # Records in the current journal file
+
+    def __init__(self, directory: str, snapshot: Callable[[], dict], *,
+                 compact_records: int = COMPACT_RECORDS, compact_interval: float = COMPACT_INTERVAL):
+        os.makedirs(directory, exist_ok=True)
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self._snapshot = snapshot
+        self._compact_records = compact_records
+        self._compact_interval = compact_interval
+        self._queue = queue.Queue()
+        self._seq = 0
+        self._written = 0
+        self._file = None
+        self._thread = None
+        self._replayed = True  # Whether the snapshot is behind the journal, until recover() says otherwise
+
+    def recover(self) -> tuple[dict | None, list[tuple[str, dict]]]:
+        """
+        The last snapshot (None if there is none) and the records written after it, in order.
+        A torn last line from a crash mid-write is ignored.
+        """
+        state = None
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                state = json.load(f)
+            self._seq = state.get("seq", 0)
+        floor = self._seq
+
+        records = []
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    if entry["seq"] > floor:
+                        records.append((entry["kind"], entry["data"]))
+                        self._seq = entry["seq"]
+        self._replayed = state is None or bool(records)
+        return state, records
+
+    def start(self) -> None:
+        """Compact whatever was replayed, then start writing in the background"""
+        self._file = open(self.journal_path, "a", encoding="utf-8")
+        if self._replayed:
+            self._compact()
+        self._thread = threading.Thread(target=self._writer, name="JournalWriter", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Write everything queued, then a final snapshot"""
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join(timeout=10.0)
+            self._thread = None
+
+    def append(self, kind: str, record: dict) -> None:
+        self._queue.put((kind, record))
+
+    def _writer(self) -> None:
+        next_compact = time.monotonic() + self._compact_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, next_compact - time.monotonic()))
+            except queue.Empty:
+                item = ()
+            # Drain whatever else is queued so one flush covers the whole batch
+            while item:
+                self._write(*item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = ()
+            self._file.flush()
+            if item is None:
+                self._compact()
+                self._file.close()
+                return
+            if self._written >= self._compact_records or time.monotonic() >= next_compact:
+                self._compact()
+                next_compact = time.monotonic() + self._compact_interval
+
+    def _write(self, kind: str, record: dict) -> None:
+        self._seq += 1
+        self._written += 1
+        self._file.write(json.dumps({"seq": self._seq, "kind": kind, "data": record}) + "\n")
+
+    def _compact(self) -> None:
+        """
+        Snapshot the live state and start an empty journal. Every record up to _seq
+        is already in the file, so the snapshot contains at least their effects.
+        """
+        state = self._snapshot()
+        state["seq"] = self._seq
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            # dumps, not dump: json.dump streams through the pure-Python encoder
+            f.write(json.dumps(state))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # A crash before the truncate leaves old records behind, recovery skips them by seq
+        self._file.close()
+        self._file = open(self.journal_path, "w", encoding="utf-8")
+        self._written = 0
@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict
+
+LATENCY_SAMPLES = 2048  # Most recent latencies kept per route for percentiles
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+class LockStats:
+    """
+    Wait time accumulated by a TimedLock. Updated while that lock is held, so it
+    needs no lock of its own; use SharedLockStats for several locks together.
+    """
+
+    def __init__(self):
+        self.acquired = 0
+        self.contended = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float | None) -> None:
+        """One acquire, after waiting `waited` seconds if it was contended"""
+        self.acquired += 1
+        if waited is not None:
+            self.contended += 1
+            self.wait_total += waited
+            if waited > self.wait_max:
+                self.wait_max = waited
+
+    def to_dict(self) -> dict:
+        return {
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "wait_total_ms": self.wait_total * 1000,
+            "wait_max_ms": self.wait_max * 1000,
+        }
+
+
+class SharedLockStats(LockStats):
+    """LockStats fed by many TimedLocks at once (e.g. one per battle), guarded by its own lock"""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+
+    def record(self, waited: float | None) -> None:
+        with self._lock:
+            super().record(waited)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return super().to_dict()
+
+
+class TimedLock:
+    """
+    Drop-in threading.Lock that records how long callers waited for it.
+    The uncontended path is one non-blocking acquire; only contended acquires are
+    timed. Stats are updated while the lock is held: a LockStats shared with other
+    locks must be a SharedLockStats.
+    Usable directly or as the lock of a threading.Condition. `lock` can be any
+    lock with the same acquire/release API, e.g. a multiprocessing.Lock.
+    """
+
+    def __init__(self, stats: LockStats | None = None, lock=None):
+        self._lock = lock if lock is not None else threading.Lock()
+        self.stats = stats if stats is not None else LockStats()
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._lock.acquire(False):
+            self.stats.record(None)
+            return True
+        if not blocking:
+            return False
+        start = time.perf_counter()
+        if not (self._lock.acquire(True, timeout) if timeout >= 0 else self._lock.acquire()):
+            return False
+        self.stats.record(time.perf_counter() - start)
+        return True
+
+    def release(self) -> None:
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc) -> None:
+        self._lock.release()
+
+
+class RouteStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0  # Responses with status >= 400
+        self.bytes = 0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def to_dict(self) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p90_ms": percentile(ordered, 90) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+            "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+        }
+
+
+class Metrics:
+    """Per-route request counters and latency samples, plus gauges read at report time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, RouteStats] = {}
+        self._locks: Dict[str, LockStats] = {}
+        self._gauges: Dict[str, Callable[[], object]] = {}
+        self._counters: Dict[str, Callable[[], int]] = {}
+        self._started = time.monotonic()
+        self._last_report = (self._started, {})  # (time, counter values) for rates
+
+    def observe(self, route: str, status: int, seconds: float, nbytes: int) -> None:
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteStats()
+            stats.count += 1
+            stats.bytes += nbytes
+            stats.latencies.append(seconds)
+            if status >= 400:
+                stats.errors += 1
+
+    def add_lock(self, name: str, stats: LockStats) -> None:
+        self._locks[name] = stats
+
+    def add_gauge(self, name: str, read: Callable[[], object]) -> None:
+        self._gauges[name] = read
+
+    def add_counter(self, name: str, read: Callable[[], int]) -> None:
+        """A monotonically increasing count, reported with its rate since the previous report"""
+        self._counters[name] = read
+
+    def report(self) -> dict:
+        now = time.monotonic()
+        counts = {name: read() for name, read in self._counters.items()}
+        with self._lock:
+            routes = {route: stats.to_dict() for route, stats in sorted(self._routes.items())}
+            last_time, last_counts = self._last_report
+            self._last_report = (now, counts)
+        elapsed = max(now - last_time, 1e-9)
+        return {
+            "uptime_s": now - self._started,
+            "routes": routes,
+            "locks": {name: stats.to_dict() for name, stats in self._locks.items()},
+            "gauges": {name: read() for name, read in self._gauges.items()},
+            "counters": {
+                name: {"total": value, "per_s": (value - last_counts.get(name, 0)) / elapsed}
+                for name, value in counts.items()
+            },
+        }
+
+
+def merge_counts(reports: list[dict]) -> dict:
+    """
+    Request and counter totals over several Metrics reports (the --workers processes).
+    Percentiles and gauges don't add up, they stay in the per-worker reports.
+    """
+    routes: Dict[str, dict] = {}
+    counters: Dict[str, dict] = {}
+    for report in reports:
+        for route, stats in report["routes"].items():
+            total = routes.setdefault(route, {"count": 0, "errors": 0, "bytes": 0})
+            for key in total:
+                total[key] += stats[key]
+        for name, counter in report["counters"].items():
+            total = counters.setdefault(name, {"total": 0, "per_s": 0.0})
+            total["total"] += counter["total"]
+            total["per_s"] += counter["per_s"]
+    return {"routes": dict(sorted(routes.items())), "counters": counters}
@@ -1,11 +1,68 @@
 import threading
 import time
 import copy
+import heapq
+import json
+import math
+import random
+from collections import deque
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
+
+from server.metrics import TimedLock, LockStats
+from server.journal import Journal
 
 TIMEOUT_TIME = 60.0
 CHECK_INTERVAL_TIME = 10.0
+CHANGE_HISTORY = 4096   # How many changes are remembered for delta streams
+CELL_SIZE = 16 * 64     # Side of a spatial index cell in pixels (16 tiles)
+SPRITES = [f"character/ow{i}.png" for i in range(1, 11)]  # Overworld sprites handed out at registration
+
+
+def cell_of(x: float, y: float) -> tuple[int, int]:
+    return (int(x // CELL_SIZE), int(y // CELL_SIZE))
+
+
+@dataclass(frozen=True)
+class Area:
+    """Square area of interest around a point on one map"""
+    map: str
+    x: float
+    y: float
+    radius: float
+
+    def contains(self, map: str, x: float, y: float) -> bool:
+        return map == self.map and abs(x - self.x) <= self.radius and abs(y - self.y) <= self.radius
+
+    def cells(self) -> list[tuple[int, int]]:
+        x0, y0 = cell_of(self.x - self.radius, self.y - self.radius)
+        x1, y1 = cell_of(self.x + self.radius, self.y + self.radius)
+        return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+    def drifted(self, other: "Area") -> bool:
+        """True once `other` is far enough from this area that it should be re-synced"""
+        if other.map != self.map or other.radius != self.radius:
+            return True
+        limit = self.radius / 4
+        return abs(other.x - self.x) > limit or abs(other.y - self.y) > limit
+
+    def to_dict(self) -> dict:
+        return {"map": self.map, "x": self.x, "y": self.y, "radius": self.radius}
+
+
+@dataclass(frozen=True)
+class Party:
+    """
+    A player's monsters and items as one immutable snapshot. Readers share it without
+    copying and must not modify the dicts; a new upload replaces the whole snapshot.
+    """
+    version: int = 0  # Client-side version
+    monsters: tuple[dict, ...] = ()
+    items: tuple[dict, ...] = ()
+
+
+EMPTY_PARTY = Party()
+
 
 @dataclass
 class Player:
@@ -16,48 +73,84 @@ class Player:
     last_update: float
     sprite: str
     direction: str
-    monsters: list = None  # Player's monsters
-    items: list = None     # Player's items
+    party: Party = EMPTY_PARTY  # Player's monsters and items
+    seq: int = 0           # Change sequence number of the last visible change
 
-    def __post_init__(self):
-        if self.monsters is None:
-            self.monsters = []
-        if self.items is None:
-            self.items = []
-
-    def update(self, x: float, y: float, map: str, direction: str, monsters: list = None, items: list = None) -> None:
-        if x != self.x or y != self.y or map != self.map:
+    def update(self, x: float, y: float, map: str, direction: str, monsters: list = None, items: list = None) -> bool:
+        """Apply an update. Returns True if anything other players can see changed."""
+        moved = x != self.x or y != self.y or map != self.map
+        if moved:
             self.last_update = time.monotonic()
+        changed = moved or direction != self.direction
         self.x = x
         self.y = y
         self.map = map
         self.direction = direction
-        if monsters is not None:
-            self.monsters = monsters
-        if items is not None:
-            self.items = items 
+        if monsters is not None or items is not None:
+            self.party = Party(
+                self.party.version,
+                tuple(monsters) if monsters is not None else self.party.monsters,
+                tuple(items) if items is not None else self.party.items,
+            )
+        return changed
 
-    def is_inactive(self) -> bool:
+    def is_inactive(self, timeout: float = TIMEOUT_TIME) -> bool:
         now = time.monotonic()
-        return (now - self.last_update) >= TIMEOUT_TIME
+        return (now - self.last_update) >= timeout
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "x": self.x,
+            "y": self.y,
+            "map": self.map,
+            "t": round(self.last_update, 3),  # Server time of the last move, for client-side interpolation
+            "Animation" : [self.sprite, self.direction.lower()] # [0] : picture, [1]: direction
+        }
 
 
 class PlayerHandler:
-    _lock: threading.Lock
+    _lock: TimedLock
+    _changed: threading.Condition
     _stop_event: threading.Event
     _thread: threading.Thread | None
     
     players: Dict[int, Player]
     _next_id: int
+    _cells: Dict[str, Dict[tuple[int, int], set[int]]]  # map -> cell -> player ids
+    _seq: int                         # Bumped on every visible change
+    _changes: deque[tuple]            # (seq, pid, old map, old x, old y) per change
+    _delta_floor: int                 # Deltas since a seq below this need a full resync
+    _snapshot: tuple[int, bytes]      # (seq, serialized player list) cache
+    _expiry: list[tuple[float, int]]  # Heap of (earliest expiry time, player id), one entry per player
+    journal: Journal | None           # Registrations, parties and removals are recorded here when set
 
-    def __init__(self, *, timeout_seconds: float = 120.0, check_interval_seconds: float = 5.0):
-        self._lock = threading.Lock()
+    def __init__(self, *, timeout_seconds: float = TIMEOUT_TIME, check_interval_seconds: float = CHECK_INTERVAL_TIME):
+        self._timeout = timeout_seconds
+        self._check_interval = check_interval_seconds
+        self._lock = TimedLock()
+        self._changed = threading.Condition(self._lock)
         self._stop_event = threading.Event()
         self._thread = None
         
         self.players = {}
         self._next_id = 0
+        self._cells = {}
+        # Starts above 0: a client echoing seq 0 back would be asking for a full snapshot every time
+        self._seq = 1
+        self._changes = deque()
+        self._delta_floor = 0
+        self._snapshot = (-1, b"")
+        self._expiry = []
+        self.journal = None
         
+    @property
+    def lock_stats(self) -> LockStats:
+        return self._lock.stats
+
+    def player_count(self) -> int:
+        return len(self.players)
+
     # Threading
     def start(self) -> None:
         if self._thread and self._thread.is_alive():
@@ -72,37 +165,103 @@ class PlayerHandler:
             self._thread.join(timeout=2.0)
 
     def _cleaner(self) -> None:
-        while not self._stop_event.wait(CHECK_INTERVAL_TIME):
+        while not self._stop_event.wait(self._check_interval):
+            self.expire()
+
+    def expire(self, now: float | None = None) -> int:
+        """
+        Remove players that have not moved for the timeout. Only heap entries that came
+        due are looked at: a player who moved since its entry was pushed is re-pushed with
+        its real deadline instead of being removed. Returns how many players were removed.
+        """
+        if now is None:
             now = time.monotonic()
-            to_remove: list[int] = []
-            with self._lock:
-                for pid, p in list(self.players.items()):
-                    if now - p.last_update >= TIMEOUT_TIME:
-                        to_remove.append(pid)
-                for pid in to_remove:
-                    _ = self.players.pop(pid, None)
+        removed = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                _, pid = heapq.heappop(self._expiry)
+                p = self.players.get(pid)
+                if p is None:
+                    continue
+                deadline = p.last_update + self._timeout
+                if deadline > now:
+                    heapq.heappush(self._expiry, (deadline, pid))
+                    continue
+                del self.players[pid]
+                self._unindex(p.id, p.map, p.x, p.y)
+                self._record_change(pid, p.map, p.x, p.y)
+                self._journal("player_removed", {"id": pid})
+                removed += 1
+            if removed:
+                self._changed.notify_all()
+        return removed
+
+    # Spatial index and change log - MUST be called with lock already held
+    def _index(self, pid: int, map: str, x: float, y: float) -> None:
+        self._cells.setdefault(map, {}).setdefault(cell_of(x, y), set()).add(pid)
+
+    def _unindex(self, pid: int, map: str, x: float, y: float) -> None:
+        cells = self._cells.get(map)
+        if not cells:
+            return
+        key = cell_of(x, y)
+        bucket = cells.get(key)
+        if bucket is not None:
+            bucket.discard(pid)
+            if not bucket:
+                del cells[key]
+        if not cells:
+            del self._cells[map]
+
+    def _record_change(self, pid: int, old_map: str | None, old_x: float = 0.0, old_y: float = 0.0) -> int:
+        self._seq += 1
+        self._changes.append((self._seq, pid, old_map, old_x, old_y))
+        if len(self._changes) > CHANGE_HISTORY:
+            self._delta_floor = self._changes.popleft()[0]
+        return self._seq
+
+    def _players_in(self, area: Area | None) -> list[Player]:
+        if area is None:
+            return list(self.players.values())
+        cells = self._cells.get(area.map, {})
+        found = []
+        for key in area.cells():
+            for pid in cells.get(key, ()):
+                p = self.players[pid]
+                if area.contains(p.map, p.x, p.y):
+                    found.append(p)
+        return found
                     
+    def _insert(self, pid: int, x: float, y: float, map: str, sprite: str, direction: str,
+                party: Party = EMPTY_PARTY) -> Player:
+        seq = self._record_change(pid, None)
+        now = time.monotonic()
+        p = self.players[pid] = Player(pid, x, y, map, now, sprite, direction, party, seq=seq)
+        self._index(pid, map, x, y)
+        heapq.heappush(self._expiry, (now + self._timeout, pid))
+        return p
+
+    def _journal(self, kind: str, record: dict) -> None:
+        """Queue a journal record - called with the lock held so records keep the order of the changes"""
+        if self.journal is not None:
+            self.journal.append(kind, record)
+
+    def _journal_party(self, p: Player) -> None:
+        if self.journal is not None:
+            self.journal.append("party", self._party_record(p.id, p.party))
+
+    @staticmethod
+    def _party_record(pid: int, party: Party) -> dict:
+        return {"id": pid, "version": party.version, "monsters": party.monsters, "items": party.items}
+
     # API
     def register(self) -> int:
         with self._lock:
             pid = self._next_id
             self._next_id += 1
-            li = [ 
-                "character/ow1.png",
-                "character/ow2.png",
-                "character/ow3.png",
-                "character/ow4.png",
-                "character/ow5.png",
-                "character/ow6.png",
-                "character/ow7.png",
-                "character/ow8.png",
-                "character/ow9.png",
-                "character/ow10.png",
-
-            ]
-            import random 
-
-            self.players[pid] = Player(pid, 0.0, 0.0, "", time.monotonic(),random.choice(li), "down")
+            p = self._insert(pid, 0.0, 0.0, "", random.choice(SPRITES), "down")
+            self._journal("player", {"id": pid, "sprite": p.sprite})
+            self._changed.notify_all()
             return pid
 
     def update(self, pid: int, x: float, y: float, map_name: str, direction: str, monsters: list = None, items: list = None) -> bool:
@@ -111,30 +270,169 @@ class PlayerHandler:
             if not p:
                 return False
             else:
-                p.update(float(x), float(y), str(map_name), str(direction), monsters, items)
+                old_map, old_x, old_y = p.map, p.x, p.y
+                if p.update(float(x), float(y), str(map_name), str(direction), monsters, items):
+                    if p.map != old_map or cell_of(p.x, p.y) != cell_of(old_x, old_y):
+                        self._unindex(pid, old_map, old_x, old_y)
+                        self._index(pid, p.map, p.x, p.y)
+                    p.seq = self._record_change(pid, old_map, old_x, old_y)
+                    self._changed.notify_all()
+                if monsters is not None or items is not None:
+                    self._journal_party(p)
                 return True
     
-    def get_player_data(self, pid: int) -> Optional[dict]:
-        """Get player's monsters and items data"""
+    def update_party(self, pid: int, monsters: list, items: list, version: int) -> bool:
+        """Replace a player's monsters and items. Out-of-order (older) versions are ignored."""
         with self._lock:
             p = self.players.get(pid)
             if not p:
-                return None
-            return {
-                "monsters": copy.deepcopy(p.monsters),
-                "items": copy.deepcopy(p.items)
-            }
+                return False
+            if version > p.party.version:
+                p.party = Party(version, tuple(monsters), tuple(items))
+                self._journal_party(p)
+            return True
+
+    # Journal
+    def export_state(self) -> dict:
+        """Every player with position and party, for a journal snapshot"""
+        with self._lock:
+            players = [
+                {"id": p.id, "x": p.x, "y": p.y, "map": p.map, "sprite": p.sprite, "direction": p.direction,
+                 "party": self._party_record(p.id, p.party)}
+                for p in self.players.values()
+            ]
+            return {"next_id": self._next_id, "players": players}
+
+    def restore(self, state: dict) -> None:
+        """Load a journal snapshot. Restored players get a full timeout to reconnect."""
+        with self._lock:
+            for d in state.get("players", []):
+                party = d["party"]
+                self._insert(d["id"], d["x"], d["y"], d["map"], d["sprite"], d["direction"],
+                             Party(party["version"], tuple(party["monsters"]), tuple(party["items"])))
+            self._next_id = max([self._next_id, state.get("next_id", 0)] + [pid + 1 for pid in self.players])
+
+    def apply(self, kind: str, record: dict) -> None:
+        """Replay one journal record on top of a restored snapshot"""
+        with self._lock:
+            pid = record["id"]
+            p = self.players.get(pid)
+            if kind == "player":
+                if p is None:
+                    self._insert(pid, 0.0, 0.0, "", record["sprite"], "down")
+                self._next_id = max(self._next_id, pid + 1)
+            elif kind == "party" and p is not None:
+                p.party = Party(record["version"], tuple(record["monsters"]), tuple(record["items"]))
+            elif kind == "player_removed" and p is not None:
+                del self.players[pid]
+                self._unindex(pid, p.map, p.x, p.y)
+                self._record_change(pid, p.map, p.x, p.y)
+
+    def get_party(self, pid: int) -> Optional[Party]:
+        """The player's current party snapshot, shared - do not modify"""
+        with self._lock:
+            p = self.players.get(pid)
+            return p.party if p else None
+
+    def get_player_data(self, pid: int) -> Optional[dict]:
+        """Get player's monsters and items data (private copies)"""
+        party = self.get_party(pid)
+        if party is None:
+            return None
+        return {
+            "monsters": copy.deepcopy(list(party.monsters)),
+            "items": copy.deepcopy(list(party.items))
+        }
 
     def list_players(self) -> dict:
         with self._lock:
-            player_list = {}
-            for p in self.players.values():
-                player_list[p.id] = {
-                    "id": p.id,
-                    "x": p.x,
-                    "y": p.y,
-                    "map": p.map,
-                    "Animation" : [p.sprite, p.direction.lower()] # [0] : picture, [1]: direction
-                }
-                print(player_list[p.id])
-            return player_list
+            return {p.id: p.to_dict() for p in self.players.values()}
+
+    def players_snapshot(self) -> bytes:
+        """
+        `{"players": {...}}` as JSON bytes, rebuilt only when the player table changed.
+        Readers of an up-to-date snapshot don't take the lock at all.
+        """
+        seq, data = self._snapshot
+        if seq == self._seq:
+            return data
+        with self._lock:
+            seq, data = self._snapshot
+            if seq != self._seq:
+                players = {p.id: p.to_dict() for p in self.players.values()}
+                data = json.dumps({"players": players}).encode("utf-8")
+                # Published as one tuple so readers never see a mismatched pair
+                self._snapshot = (self._seq, data)
+            return data
+
+    def players_near(self, area: Area) -> dict:
+        """Players inside `area`, looked up through the spatial index"""
+        with self._lock:
+            return {p.id: p.to_dict() for p in self._players_in(area)}
+
+    def _delta(self, since: int, area: Area | None) -> dict:
+        """
+        Players changed after sequence number `since` - MUST be called with lock already held.
+        Falls back to a full snapshot when `since` is 0 or too old to build a delta from.
+        With an area, players that left it are reported as removed.
+        """
+        full = since <= 0 or since < self._delta_floor or since > self._seq
+        changed = {}
+        removed = []
+        if full:
+            changed = {p.id: p.to_dict() for p in self._players_in(area)}
+        else:
+            # Walk back to the first change after `since`, remembering where each player was then
+            first_seen: dict[int, tuple] = {}
+            for seq, pid, old_map, old_x, old_y in reversed(self._changes):
+                if seq <= since:
+                    break
+                first_seen[pid] = (old_map, old_x, old_y)
+            for pid, (old_map, old_x, old_y) in first_seen.items():
+                p = self.players.get(pid)
+                if p and (area is None or area.contains(p.map, p.x, p.y)):
+                    changed[pid] = p.to_dict()
+                elif area is None or (old_map is not None and area.contains(old_map, old_x, old_y)):
+                    removed.append(pid)
+        return {"seq": self._seq, "full": full, "players": changed, "removed": removed}
+
+    def _viewer_area(self, viewer: int, radius: float) -> Area | None:
+        p = self.players.get(viewer)
+        if not p:
+            return None
+        return Area(p.map, p.x, p.y, radius)
+
+    def notify(self) -> None:
+        """Wake all waiting streams, e.g. when a battle involving a viewer was created"""
+        with self._changed:
+            self._changed.notify_all()
+
+    def wait_for_delta(self, since: int, timeout: float, *, viewer: int | None = None,
+                       radius: float = 0.0, area: Area | None = None,
+                       until: Callable[[], bool] | None = None) -> dict:
+        """
+        Block until something changed after `since` (inside the viewer's area, if any),
+        `until()` returns True, or `timeout` passes. When the viewer has moved away
+        from `area`, a fresh snapshot around the viewer is returned instead.
+        """
+        if not math.isfinite(timeout):
+            # A NaN deadline would never pass, the wait below would spin
+            raise ValueError(f"timeout must be finite, got {timeout}")
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                if viewer is not None and radius > 0:
+                    current = self._viewer_area(viewer, radius)
+                    if current and (area is None or area.drifted(current)):
+                        area = current
+                        since = 0
+                delta = self._delta(since, area)
+                remaining = deadline - time.monotonic()
+                if (delta["full"] or delta["players"] or delta["removed"] or remaining <= 0
+                        or (until is not None and until())):
+                    delta["area"] = area.to_dict() if area else None
+                    delta["time"] = round(time.monotonic(), 3)
+                    return delta
+                # Nothing relevant to this client yet, keep waiting from here
+                since = delta["seq"]
+                self._changed.wait(remaining)
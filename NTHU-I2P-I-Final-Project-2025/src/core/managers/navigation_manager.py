@@ -5,6 +5,7 @@ Handles path following, speed control, and navigation state.
 
 from typing import List, Tuple, Optional, TYPE_CHECKING
 from src.utils import GameSettings, Position, Logger
+from src.utils.pathfinding import PathCache
 # from src.core.managers.game_manager import GameManager
 if TYPE_CHECKING:
     from src.entities import Player
@@ -35,6 +36,9 @@ class NavigationManager:
         self.stuck_threshold = 60  # 1 second at 60fps
         self.last_distance = float('inf')
         
+        # Paths found so far, reused when navigating to the same place again
+        self.path_cache = PathCache()
+        
         Logger.info("NavigationManager initialized")
     
     def start_navigation(self, path: List[Tuple[int, int]], target_name: str = "destination"):
@@ -1,25 +1,105 @@
+import copy
+import hashlib
+import json
 import requests
+import struct
+from requests.adapters import HTTPAdapter
 import threading
 import time
 from src.utils import Logger, GameSettings
+from src.utils import wire
+from src.utils.interpolation import SnapshotInterpolator
 POLL_INTERVAL = 0.02
+STREAM_TIMEOUT = 20.0   # How long the server may hold a /players/stream request
+STREAM_RETRY = 1.0      # Back-off after a failed stream request
+BATTLE_POLL_INTERVAL = 1.0  # /battle/check rate, only without the stream
+BATTLE_WAIT_TIMEOUT = 15.0  # How long the server may hold a /battle/status?since_turn= request
+BATTLE_WATCH_RETRIES = 10   # Failed /battle/status requests in a row before the battle counts as gone
+POOL_SIZE = 4           # Kept-alive connections (poller, sender, game thread + spare)
+INTERP_DELAY = 1.5      # Remote players are drawn this many send intervals in the past
+EXTRAPOLATE = 0.5       # Late snapshots are extrapolated for at most this many send intervals
+
+# (connect, read) timeouts per endpoint
+TIMEOUTS: dict[str, tuple[float, float]] = {
+    "register": (2.0, 5.0),
+    "control": (2.0, 5.0),
+    "position": (1.0, 2.0),
+    "party": (2.0, 5.0),
+    "players": (1.0, 2.0),
+    "stream": (2.0, STREAM_TIMEOUT + 5.0),
+    "battle": (2.0, 5.0),
+    "battle_check": (1.0, 2.0),
+    "battle_wait": (2.0, BATTLE_WAIT_TIMEOUT + 5.0),
+    "batch": (1.0, 3.0),
+}
 
 class OnlineManager:
     list_players: list[dict]
     player_id: int
+
+    _players: dict[int, dict]   # All known players, kept in sync by the stream
+    _seq: int                   # Last sequence number received from the stream
+    _area: dict | None          # Area of interest the player table was built for
+    _stream_supported: bool
+    _batch_supported: bool | None   # None until the first /batch request
+    _pending_battle: dict       # {"has_battle", "battle_id", "opponent_id"} or {}
+    _left_battles: set[str]     # Battles this client ended or deleted, never offered again
+    _battle_watch: str | None   # Battle followed by the status watcher thread
+    _battle_watch_stop: threading.Event # Set to stop that watcher, each one gets its own
+    _battle_status: dict | None # Latest full status of that battle, {} once it is gone
+    _battle_view: dict | None   # Copy of _battle_status handed out to the scene
+    _interp: SnapshotInterpolator   # Position history of the players in list_players
     
     _stop_event: threading.Event
     _thread: threading.Thread | None
+    _sender: threading.Thread | None
+    _send_event: threading.Event
+    _pending_update: dict | None   # Latest position waiting for the sender thread
+    _pending_party: tuple[list, list] | None   # Latest (monsters, items) for the sender thread
+    _last_sent_update: dict | None
+    _party_hash: bytes | None      # Digest of the party the server currently has
+    _party_version: int
+    _wire_binary: bool | None      # None until negotiated with the server
+    _map_indices: dict[str, int | None]  # Map name -> index for the binary format, None: send JSON
     _lock: threading.Lock
+    _session: requests.Session
     
     def __init__(self):
         self.base: str = GameSettings.ONLINE_SERVER_URL
         self.player_id = -1
         self.list_players = []
+        self._players = {}
+        self._seq = 0
+        self._area = None
+        self._stream_supported = True
+        self._batch_supported = None
+        self._pending_battle = {}
+        self._left_battles = set()
+        self._battle_watch = None
+        self._battle_watch_stop = threading.Event()
+        self._battle_status = None
+        self._battle_view = None
+        interval = 1.0 / GameSettings.ONLINE_SEND_RATE
+        self._interp = SnapshotInterpolator(interval, INTERP_DELAY * interval, EXTRAPOLATE * interval)
 
         self._thread = None
+        self._sender = None
         self._stop_event = threading.Event()
+        self._send_event = threading.Event()
+        self._pending_update = None
+        self._pending_party = None
+        self._last_sent_update = None
+        self._party_hash = None
+        self._party_version = 0
+        self._wire_binary = None
+        self._map_indices = {}
         self._lock = threading.Lock()
+
+        # One keep-alive pool shared by every thread instead of a new socket per request
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
         
         Logger.info("OnlineManager initialized")
         
@@ -34,13 +114,30 @@ class OnlineManager:
         with self._lock:
             return list(self.list_players)
 
+    def get_draw_position(self, player: dict) -> tuple[float, float]:
+        """Where to draw a player from list_players right now, smoothed between snapshots"""
+        with self._lock:
+            pos = self._interp.position(int(player["id"]), time.monotonic())
+        return pos if pos is not None else (player["x"], player["y"])
+
+    def _set_players(self, players: list[dict], server_time: float | None = None) -> None:
+        """Publish a new player list, called from the poller thread"""
+        now = time.monotonic()
+        with self._lock:
+            if server_time is not None:
+                self._interp.observe_clock(server_time, now)
+            for p in players:
+                self._interp.push(p, now)
+            self._interp.retain(int(p["id"]) for p in players)
+            self.list_players = players
+
     # ------------------------------------------------------------------
     # Threading and API Calling Below
     # ------------------------------------------------------------------
     def register(self):
         try:
             url = f"{self.base}/register"
-            resp = requests.get(url, timeout=5)
+            resp = self._session.get(url, timeout=TIMEOUTS["register"])
             resp.raise_for_status()
             data = resp.json()
             if resp.status_code == 200:
@@ -68,7 +165,7 @@ class OnlineManager:
                 }
             }
             Logger.info(f"Creating battle: player1={self.player_id}, player2={opponent_id}")
-            resp = requests.post(url, json=body, timeout=5)
+            resp = self._session.post(url, json=body, timeout=TIMEOUTS["battle"])
             if resp.status_code == 200:
                 data = resp.json()
                 Logger.info(f"Battle created successfully: {data.get('battle_id')}")
@@ -90,7 +187,7 @@ class OnlineManager:
                 "action_type": action_type,
                 "data": data or {}
             }
-            resp = requests.post(url, json=body, timeout=5)
+            resp = self._session.post(url, json=body, timeout=TIMEOUTS["battle"])
             if resp.status_code == 200:
                 Logger.info(f"Action submitted: {action_type}")
                 return True
@@ -110,7 +207,7 @@ class OnlineManager:
         try:
             url = f"{self.base}/battle/status?battle_id={battle_id}&player_id={self.player_id}"
             Logger.info(f"Getting battle status - battle_id: {battle_id}, player_id: {self.player_id}")
-            resp = requests.get(url, timeout=5)
+            resp = self._session.get(url, timeout=TIMEOUTS["battle"])
             if resp.status_code == 200:
                 return resp.json()
             else:
@@ -120,14 +217,131 @@ class OnlineManager:
             Logger.warning(f"Get battle status error: {e}")
             return {}
     
+    def poll_battle_status(self, battle_id: str) -> dict | None:
+        """
+        Non-blocking battle status for the render thread, shaped like get_battle_status().
+        A background thread long-polls the server for each new turn and merges the
+        changes in. Returns None until the first status arrived, {} once the battle is gone.
+        """
+        with self._lock:
+            if self._battle_watch != battle_id:
+                # A previous watcher may still be in a long-poll: it stops after it, and
+                # whatever it gets back is dropped, its event is no longer the current one
+                self._battle_watch_stop.set()
+                self._battle_watch_stop = threading.Event()
+                self._battle_watch = battle_id
+                self._battle_status = None
+                self._battle_view = None
+                threading.Thread(
+                    target=self._watch_battle,
+                    args=(battle_id, self._battle_watch_stop),
+                    name="OnlineManagerBattle",
+                    daemon=True
+                ).start()
+            if self._battle_view is None and self._battle_status is not None:
+                # The scene keeps references into it (bag.monsters), never share with the merger
+                self._battle_view = copy.deepcopy(self._battle_status)
+            return self._battle_view
+
+    def stop_battle_watch(self) -> None:
+        """Stop following a battle, the watcher thread exits after its current request"""
+        with self._lock:
+            self._battle_watch_stop.set()
+            self._battle_watch = None
+            self._battle_status = None
+            self._battle_view = None
+
+    def _watch_battle(self, battle_id: str, stop: threading.Event) -> None:
+        url = f"{self.base}/battle/status"
+        status = None
+        failures = 0
+        while not stop.is_set():
+            if failures >= BATTLE_WATCH_RETRIES:
+                # Server unreachable for good: report the battle as gone, like a 404
+                Logger.warning(f"Battle status unavailable after {failures} attempts, giving up on {battle_id}")
+                with self._lock:
+                    if not stop.is_set():
+                        self._battle_status = {}
+                        self._battle_view = None
+                return
+            params = {"battle_id": battle_id, "player_id": self.player_id}
+            if status is not None:
+                params["since_turn"] = status.get("turn_count", 0)
+                params["timeout"] = BATTLE_WAIT_TIMEOUT
+            try:
+                resp = self._session.get(url, params=params, timeout=TIMEOUTS["battle_wait"])
+            except Exception as e:
+                Logger.warning(f"Battle status wait error: {e}")
+                failures += 1
+                stop.wait(STREAM_RETRY)
+                continue
+
+            if resp.status_code == 404:
+                merged = {}
+            elif resp.status_code == 200:
+                merged = self._merge_battle_status(status, resp.json())
+            else:
+                Logger.warning(f"Battle status wait failed: {resp.status_code}, response: {resp.text}")
+                failures += 1
+                stop.wait(STREAM_RETRY)
+                continue
+            failures = 0
+
+            changed = status is None or not merged or any(
+                merged.get(k) != status.get(k)
+                for k in ("turn_count", "status", "player1_action_submitted", "player2_action_submitted")
+            )
+            status = merged
+            if changed:
+                with self._lock:
+                    if stop.is_set():
+                        return
+                    self._battle_status = status
+                    self._battle_view = None
+            if not status or status.get("status") in ("finished", "timeout"):
+                return
+
+    @staticmethod
+    def _merge_battle_status(status: dict | None, data: dict) -> dict:
+        """Apply a compact /battle/status answer (with "changes") on top of the last full one"""
+        changes = data.pop("changes", None)
+        if changes is None or status is None:
+            return data
+        merged = {**status, **data}
+        for key, entries in changes.items():
+            updated = list(merged.get(key, []))
+            for idx, entry in entries.items():
+                i = int(idx)
+                if i < len(updated):
+                    updated[i] = entry
+                else:
+                    updated.append(entry)
+            merged[key] = updated
+        return merged
+
     def check_pending_battle(self) -> dict:
-        """Check if there's a pending battle for this player"""
+        """
+        Pending battle for this player, as last pushed by the server.
+        Never touches the network, safe to call every frame. Battles this client
+        already ended or deleted are left out, the stream may still report them.
+        """
+        with self._lock:
+            if self._pending_battle.get("battle_id") in self._left_battles:
+                return {}
+            return dict(self._pending_battle)
+
+    def _leave_battle(self, battle_id: str) -> None:
+        with self._lock:
+            self._left_battles.add(battle_id)
+
+    def _fetch_pending_battle(self) -> dict:
+        """Ask the server for a pending battle (only used when the stream is unavailable)"""
         if self.player_id == -1:
             return {}
         
         try:
             url = f"{self.base}/battle/check?player_id={self.player_id}"
-            resp = requests.get(url, timeout=5)
+            resp = self._session.get(url, timeout=TIMEOUTS["battle_check"])
             if resp.status_code == 200:
                 data = resp.json()
                 if data.get('has_battle'):
@@ -143,10 +357,11 @@ class OnlineManager:
     
     def end_battle(self, battle_id: str) -> bool:
         """Mark battle as finished"""
+        self._leave_battle(battle_id)
         try:
             url = f"{self.base}/battle/end"
             body = {"battle_id": battle_id}
-            resp = requests.post(url, json=body, timeout=5)
+            resp = self._session.post(url, json=body, timeout=TIMEOUTS["battle"])
             if resp.status_code == 200:
                 Logger.info("Battle marked as finished")
                 return True
@@ -159,10 +374,11 @@ class OnlineManager:
     
     def delete_battle(self, battle_id: str) -> bool:
         """Permanently delete a battle"""
+        self._leave_battle(battle_id)
         try:
             url = f"{self.base}/battle/delete"
             body = {"battle_id": battle_id}
-            resp = requests.post(url, json=body, timeout=5)
+            resp = self._session.post(url, json=body, timeout=TIMEOUTS["battle"])
             if resp.status_code == 200:
                 Logger.info("Battle deleted")
                 return True
@@ -174,6 +390,7 @@ class OnlineManager:
             return False
 
     def update(self, x: float, y: float, map_name: str) -> bool:
+        """Queue the latest position for the sender thread. Never blocks on the network."""
         if self.player_id == -1:
             # Try to register again
             return False
@@ -181,66 +398,317 @@ class OnlineManager:
         game_manager = get_game_manager()
         player = game_manager.player
         
-        # Include monsters and items data in update
-        monsters = game_manager.bag.get_monsters()
-        items = game_manager.bag.get_items()
-        
-        url = f"{self.base}/players"
         body = {
             "id": self.player_id, 
             "x": x, 
             "y": y, 
             "map": map_name,
             "direction": player.direction.name,
-            "monsters": monsters,
-            "items": items
         }
-        # print(body)
+        # Older unsent positions are simply replaced, only the latest one matters
+        with self._lock:
+            self._pending_update = body
+            self._pending_party = (game_manager.bag.get_monsters(), game_manager.bag.get_items())
+        self._send_event.set()
+        return True
+
+    def _negotiate_wire(self) -> bool:
+        """Use the binary position format only if asked to and the server supports it."""
+        if self._wire_binary is None:
+            self._wire_binary = False
+            if GameSettings.ONLINE_WIRE_FORMAT == "binary":
+                try:
+                    resp = self._session.get(f"{self.base}/wire", timeout=TIMEOUTS["control"])
+                    if resp.status_code == 200 and "binary" in resp.json().get("formats", []):
+                        self._wire_binary = True
+                        Logger.info("OnlineManager using binary position updates")
+                except Exception as e:
+                    Logger.warning(f"Wire format negotiation error: {e}")
+        return self._wire_binary
+
+    def _map_index(self, map_name: str) -> int | None:
+        if map_name in self._map_indices:
+            return self._map_indices[map_name]
+        idx = None
         try:
-            resp = requests.post(url, json=body, timeout=5)
-            if resp.status_code == 200:
+            resp = self._session.post(f"{self.base}/maps", json={"map": map_name}, timeout=TIMEOUTS["control"])
+            if resp.status_code in (400, 503):
+                # Name refused or table full: this map's updates go out as JSON from now on
+                Logger.warning(f"Map index refused for {map_name!r}: {resp.status_code} {resp.text}")
+                self._map_indices[map_name] = None
+                return None
+            resp.raise_for_status()
+            idx = self._map_indices[map_name] = int(resp.json()["index"])
+        except Exception as e:
+            Logger.warning(f"Map index lookup error: {e}")
+        return idx
+
+    def _send_update(self, body: dict) -> bool:
+        # Standing still produces the same body every frame, nothing to tell the server
+        if body == self._last_sent_update:
+            return True
+        url = f"{self.base}/players"
+        try:
+            map_index = self._map_index(body["map"]) if self._negotiate_wire() else None
+            data = None
+            if map_index is not None:
+                try:
+                    data = wire.pack_position(body["id"], body["x"], body["y"], map_index, body["direction"])
+                except struct.error as e:
+                    # Id or index out of the format's range, JSON can carry it
+                    Logger.warning(f"Binary position update not possible, sending JSON: {e}")
+            if data is not None:
+                resp = self._session.post(url, data=data, headers={"Content-Type": wire.CONTENT_TYPE}, timeout=TIMEOUTS["position"])
+            else:
+                resp = self._session.post(url, json=body, timeout=TIMEOUTS["position"])
+            if resp.status_code in (200, 204):
+                self._last_sent_update = body
                 return True
+            if resp.status_code == 404:
+                # Server forgot us (restart or timeout), the party must be sent again
+                self._party_hash = None
             Logger.warning(f"Update failed: {resp.status_code} {resp.text}")
         except Exception as e:
-            if self._on_error:
-                try:
-                    self._on_error(e)
-                except Exception:
-                    pass
             Logger.warning(f"Online update error: {e}")
         return False
 
+    def _party_payload(self, monsters: list, items: list) -> tuple[str, bytes] | None:
+        """(party JSON, digest) when it differs from what the server has, else None"""
+        try:
+            party = json.dumps({"monsters": monsters, "items": items}, sort_keys=True)
+        except (RuntimeError, TypeError, ValueError):
+            # The bag was modified while we were reading it, try again on the next send
+            return None
+        digest = hashlib.sha1(party.encode("utf-8")).digest()
+        if digest == self._party_hash:
+            return None
+        return party, digest
+
+    def _send_party(self, monsters: list, items: list) -> bool:
+        """Upload monsters and items, but only when they differ from the last upload."""
+        payload = self._party_payload(monsters, items)
+        if payload is None:
+            return True
+        party, digest = payload
+
+        version = self._party_version + 1
+        url = f"{self.base}/players/party"
+        data = f'{{"id": {self.player_id}, "version": {version}, "party": {party}}}'
+        try:
+            resp = self._session.post(url, data=data.encode("utf-8"),
+                                 headers={"Content-Type": "application/json"}, timeout=TIMEOUTS["party"])
+            if resp.status_code == 200:
+                self._party_version = version
+                self._party_hash = digest
+                return True
+            Logger.warning(f"Party sync failed: {resp.status_code} {resp.text}")
+        except Exception as e:
+            Logger.warning(f"Party sync error: {e}")
+        return False
+
+    def _batch(self, ops: list[str]) -> list[dict] | None:
+        """
+        Run several operations (each already JSON-encoded) in one /batch round-trip.
+        Returns one {"status", "body"} per op, or None if the request failed or the
+        server has no /batch (then _batch_supported turns False and callers fall back).
+        """
+        if self._batch_supported is False:
+            return None
+        data = ('{"ops": [' + ", ".join(ops) + "]}").encode("utf-8")
+        try:
+            resp = self._session.post(f"{self.base}/batch", data=data,
+                                      headers={"Content-Type": "application/json"}, timeout=TIMEOUTS["batch"])
+            if resp.status_code == 404:
+                Logger.warning("Server has no /batch, using separate requests")
+                self._batch_supported = False
+                return None
+            resp.raise_for_status()
+            results = resp.json()["results"]
+        except Exception as e:
+            Logger.warning(f"Batch request error: {e}")
+            return None
+        self._batch_supported = True
+        return results
+
+    def _send_batch(self, body: dict | None, party: tuple[list, list] | None) -> bool:
+        """Party (if changed) and position in one round-trip. False means: send them separately."""
+        if self._batch_supported is False:
+            return False
+        ops, kinds = [], []
+        payload = self._party_payload(*party) if party is not None else None
+        version = self._party_version + 1
+        if payload is not None:
+            ops.append(f'{{"op": "party", "id": {self.player_id}, "version": {version}, "party": {payload[0]}}}')
+            kinds.append("party")
+        if body is not None and body != self._last_sent_update:
+            ops.append(json.dumps({"op": "position", **body}))
+            kinds.append("position")
+        if not ops:
+            return True
+
+        results = self._batch(ops)
+        if results is None:
+            # Unsupported: the caller sends separately right away. Failed: retried with the next position.
+            return self._batch_supported is not False
+        for kind, result in zip(kinds, results):
+            status = result.get("status")
+            if kind == "party" and status == 200:
+                self._party_version = version
+                self._party_hash = payload[1]
+            elif kind == "position" and status == 200:
+                self._last_sent_update = body
+            elif status == 404:
+                # Server forgot us (restart or timeout), the party must be sent again
+                self._party_hash = None
+            else:
+                Logger.warning(f"Batch {kind} failed: {status} {result.get('body')}")
+        return True
+
+    def _poll_batch(self) -> bool:
+        """Polling fallback: players around us and the pending battle in one round-trip"""
+        if self._batch_supported is False or self.player_id == -1:
+            return False
+        players_op = {"op": "players"}
+        last = self._last_sent_update
+        if last:
+            players_op.update(map=last["map"], x=last["x"], y=last["y"],
+                              radius=GameSettings.ONLINE_AOI_RADIUS * GameSettings.TILE_SIZE)
+        results = self._batch([json.dumps(players_op),
+                               json.dumps({"op": "battle_check", "player_id": self.player_id})])
+        if results is None:
+            return self._batch_supported is not False
+        players, battle = results
+        if players.get("status") == 200:
+            pid = self.player_id
+            found = players["body"].get("players", {})
+            self._set_players([p for key, p in found.items() if int(key) != pid])
+        if battle.get("status") == 200:
+            pending = battle["body"] if battle["body"].get("has_battle") else {}
+            with self._lock:
+                self._pending_battle = pending
+        return True
+
     def start(self) -> None:
-        if self._thread and self._thread.is_alive():
+        if self._thread and self._thread.is_alive() and not self._stop_event.is_set():
             return
-        self._stop_event.clear()
+        # A stopped poller may still be parked in a long-poll, give the new one its own event
+        self._stop_event = threading.Event()
+        # Whatever was pending when we stopped may be gone by now, the stream will tell
+        with self._lock:
+            self._pending_battle = {}
         self._thread = threading.Thread(
             target=self._loop,
+            args=(self._stop_event,),
             name="OnlineManagerPoller",
             daemon=True
         )
         self._thread.start()
+        self._sender = threading.Thread(
+            target=self._send_loop,
+            args=(self._stop_event,),
+            name="OnlineManagerSender",
+            daemon=True
+        )
+        self._sender.start()
 
     def stop(self) -> None:
+        # Both threads are daemons and exit on their own, joining them here
+        # would stall the caller (the render thread) for a pending request
         self._stop_event.set()
-        if self._thread and self._thread.is_alive():
-            self._thread.join(timeout=2)
+        self._send_event.set()
+        self.stop_battle_watch()
+
+    def _send_loop(self, stop_event: threading.Event) -> None:
+        interval = 1.0 / GameSettings.ONLINE_SEND_RATE
+        while not stop_event.is_set():
+            self._send_event.wait()
+            self._send_event.clear()
+            if stop_event.is_set():
+                return
+            with self._lock:
+                body, self._pending_update = self._pending_update, None
+                party, self._pending_party = self._pending_party, None
+            # One /batch round-trip when we can, the binary format has its own endpoint
+            if self._negotiate_wire() or not self._send_batch(body, party):
+                if party is not None:
+                    self._send_party(*party)
+                if body is not None:
+                    self._send_update(body)
+            # Positions queued meanwhile are coalesced into the next send
+            stop_event.wait(interval)
+
+    def _loop(self, stop_event: threading.Event) -> None:
+        next_battle_check = 0.0
+        while not stop_event.is_set():
+            if self._stream_supported:
+                if not self._stream_players(stop_event):
+                    stop_event.wait(STREAM_RETRY)
+            elif not stop_event.wait(POLL_INTERVAL):
+                if self._poll_batch():
+                    continue
+                self._fetch_players()
+                if time.monotonic() >= next_battle_check:
+                    next_battle_check = time.monotonic() + BATTLE_POLL_INTERVAL
+                    pending = self._fetch_pending_battle()
+                    with self._lock:
+                        self._pending_battle = pending
+
+    def _stream_players(self, stop_event: threading.Event) -> bool:
+        """Wait for the next player delta from the server and apply it."""
+        try:
+            url = f"{self.base}/players/stream"
+            params = {"since": self._seq, "timeout": STREAM_TIMEOUT}
+            if self.player_id != -1:
+                # Only players around us; the server re-centres the area as we move
+                params["player_id"] = self.player_id
+                params["radius"] = GameSettings.ONLINE_AOI_RADIUS * GameSettings.TILE_SIZE
+                if self._area:
+                    params.update(map=self._area["map"], x=self._area["x"], y=self._area["y"])
+                # The server answers right away if our battle differs from this one
+                params["battle"] = self._pending_battle.get("battle_id", "")
+            resp = self._session.get(url, params=params, timeout=TIMEOUTS["stream"])
+            if resp.status_code == 404:
+                Logger.warning("Server has no player stream, falling back to polling")
+                self._stream_supported = False
+                return True
+            resp.raise_for_status()
+            delta = resp.json()
+        except Exception as e:
+            Logger.warning(f"OnlineManager stream error: {e}")
+            return False
+        if stop_event.is_set():
+            # A newer poller owns the player table now
+            return True
 
-    def _loop(self) -> None:
-        while not self._stop_event.wait(POLL_INTERVAL):
-            self._fetch_players()
+        if delta.get("full"):
+            self._players = {}
+        for key, p in delta.get("players", {}).items():
+            self._players[int(key)] = p
+        for pid in delta.get("removed", []):
+            self._players.pop(int(pid), None)
+        self._seq = delta.get("seq", self._seq)
+        self._area = delta.get("area")
+
+        battle = delta.get("battle", {})
+        pending = battle if battle.get("has_battle") else {}
+        if pending and pending.get("battle_id") != self._pending_battle.get("battle_id"):
+            Logger.info(f"Pending battle found: {pending.get('battle_id')}")
+
+        pid = self.player_id
+        self._set_players([p for key, p in self._players.items() if key != pid], delta.get("time"))
+        with self._lock:
+            self._pending_battle = pending
+        return True
             
     def _fetch_players(self) -> None:
         try:
             url = f"{self.base}/players"
-            resp = requests.get(url, timeout=5)
+            resp = self._session.get(url, timeout=TIMEOUTS["players"])
             resp.raise_for_status()
             all_players = resp.json().get("players", [])
 
             pid = self.player_id
-            filtered = [p for key, p in all_players.items() if int(key) != pid]
-            with self._lock:
-                self.list_players = filtered
+            self._set_players([p for key, p in all_players.items() if int(key) != pid])
             
         except Exception as e:
             Logger.warning(f"OnlineManager fetch error: {e}")
\ No newline at end of file
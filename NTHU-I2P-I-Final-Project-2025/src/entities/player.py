@@ -151,7 +151,8 @@ class Player(Entity):
         super().update(dt)
 
     def check_collision(self, rect: pg.Rect) -> bool:
-        return self.game_manager.check_collision(rect) | self.game_manager.current_map.check_collision(rect)
+        # GameManager.check_collision already includes the current map
+        return self.game_manager.check_collision(rect)
     
     def lock_movement(self, duration: float = 0.5) -> None:
         self.movement_lock_timer = duration
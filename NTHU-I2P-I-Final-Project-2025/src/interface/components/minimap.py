@@ -6,6 +6,7 @@ Shows player position, other players, NPCs, and landmarks.
 import pygame as pg
 from typing import List, Tuple, Optional
 from src.utils import GameSettings, Position
+from src.utils.pathfinding import PathfindingGrid
 
 
 class Minimap:
@@ -66,7 +67,7 @@ class Minimap:
             self.time_since_update = 0.0
     
     def draw(self, screen: pg.Surface, player_pos: Position, 
-             collision_map: List[pg.Rect],
+             grid: PathfindingGrid,
              other_players: List[dict] = None,
              npcs: List[dict] = None,
              teleporters: List = None,
@@ -77,7 +78,7 @@ class Minimap:
         Args:
             screen: Screen surface to draw on
             player_pos: Player's current position (pixel coordinates)
-            collision_map: List of collision rectangles
+            grid: Walkable tiles of the current map
             other_players: List of other player dicts with 'x', 'y', 'map' keys
             npcs: List of NPC dicts with 'x', 'y' keys
             teleporters: List of Teleport objects
@@ -119,16 +120,8 @@ class Minimap:
                 if screen_x >= self.size[0] or screen_y >= self.size[1]:
                     continue
                 
-                # Check if tile has collision
-                tile_rect = pg.Rect(
-                    tile_x * GameSettings.TILE_SIZE,
-                    tile_y * GameSettings.TILE_SIZE,
-                    GameSettings.TILE_SIZE,
-                    GameSettings.TILE_SIZE
-                )
-                
-                has_collision = any(tile_rect.colliderect(r) for r in collision_map)
-                color = self.collision_color if has_collision else self.walkable_color
+                # Tiles outside the map count as collision
+                color = self.walkable_color if grid.is_walkable(tile_x, tile_y) else self.collision_color
                 
                 # Draw tile (small rectangle)
                 tile_size = max(1, int(pixel_size))
@@ -2,6 +2,7 @@ import pygame as pg
 import pytmx
 
 from src.utils import load_tmx, Position, GameSettings, PositionCamera, Teleport
+from src.utils.pathfinding import PathfindingGrid
 
 class Map:
     # Map Properties
@@ -13,6 +14,9 @@ class Map:
     # Rendering Properties
     _surface: pg.Surface
     _collision_map: list[pg.Rect]
+    _collision_grid: bytearray                   # One byte per tile, 1 where a collision tile is
+    _collision_bounds: tuple[int, int, int, int]  # Tile x, y, width, height covered by _collision_grid
+    pathfinding_grid: PathfindingGrid            # Walkable tiles of the map, shared by navigation and the minimap
 
     # def __init__(self, path: str, tp: list[Teleport], spawn: Position):
     def __init__(self, path: str, tp: list[Teleport]):
@@ -29,6 +33,8 @@ class Map:
         self._render_all_layers(self._surface)
         # Prebake the collision map
         self._collision_map = self._create_collision_map()
+        self._collision_grid, self._collision_bounds = self._create_collision_grid(self._collision_map)
+        self.pathfinding_grid = self._create_pathfinding_grid()
         self._bush_map = self._create_bush_map()
 
     def update(self, dt: float):
@@ -59,8 +65,24 @@ class Map:
         Return True if collide if rect param collide with self._collision_map
         Hint: use API colliderect and iterate each rectangle to check
         '''
-        # print(  "Checking collision for rect:", rect  )
-        return any(rect.colliderect(r) for r in self._collision_map)
+        # Same result as any(rect.colliderect(r) for r in self._collision_map), but only
+        # the tiles under the rect are looked at
+        if rect.w == 0 or rect.h == 0:
+            return False
+        T = GameSettings.TILE_SIZE
+        gx, gy, width, height = self._collision_bounds
+        left, right = min(rect.x, rect.x + rect.w), max(rect.x, rect.x + rect.w)
+        top, bottom = min(rect.y, rect.y + rect.h), max(rect.y, rect.y + rect.h)
+        tx0, tx1 = max(left // T - gx, 0), min((right - 1) // T - gx, width - 1)
+        ty0, ty1 = max(top // T - gy, 0), min((bottom - 1) // T - gy, height - 1)
+        if tx0 > tx1:
+            return False
+        grid = self._collision_grid
+        for ty in range(ty0, ty1 + 1):
+            row = ty * width
+            if grid.find(1, row + tx0, row + tx1 + 1) != -1:
+                return True
+        return False
         
     def check_teleport(self, pos: Position) -> Teleport | None:
         for tp in self.teleporters:
@@ -116,6 +138,34 @@ class Map:
                             GameSettings.TILE_SIZE
                         ))
         return rects
+    @staticmethod
+    def _create_collision_grid(rects: list[pg.Rect]) -> tuple[bytearray, tuple[int, int, int, int]]:
+        """
+        Tile bitmap of the (tile-sized, tile-aligned) collision rects. It spans the rects
+        rather than the map, collision layers can be larger than the map itself.
+        """
+        T = GameSettings.TILE_SIZE
+        if not rects:
+            return bytearray(), (0, 0, 0, 0)
+        gx, gy = min(r.x for r in rects) // T, min(r.y for r in rects) // T
+        width = max(r.x for r in rects) // T - gx + 1
+        height = max(r.y for r in rects) // T - gy + 1
+        grid = bytearray(width * height)
+        for r in rects:
+            grid[(r.y // T - gy) * width + r.x // T - gx] = 1
+        return grid, (gx, gy, width, height)
+
+    def _create_pathfinding_grid(self) -> PathfindingGrid:
+        """Walkability of every map tile, the collision bitmap inverted and cropped to the map"""
+        width, height = self.tmxdata.width, self.tmxdata.height
+        walkable = bytearray(b"\x01") * (width * height)
+        gx, gy, cw, _ = self._collision_bounds
+        for i, blocked in enumerate(self._collision_grid):
+            tx, ty = gx + i % cw, gy + i // cw
+            if blocked and 0 <= tx < width and 0 <= ty < height:
+                walkable[ty * width + tx] = 0
+        return PathfindingGrid(width, height, walkable)
+
     def _create_bush_map(self) -> list[pg.Rect]:
         rects = []
         for layer in self.tmxdata.visible_layers:
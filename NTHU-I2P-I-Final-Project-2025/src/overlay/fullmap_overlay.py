@@ -7,7 +7,7 @@ from typing import Callable, List, Tuple
 from src.overlay.overlay import Overlay
 from src.interface.components import Button
 from src.utils import GameSettings, Position, Teleport
-from src.utils.pathfinding import PathfindingGrid, a_star, pixel_to_tile, tile_to_pixel
+from src.utils.pathfinding import pixel_to_tile, tile_to_pixel
 from src.core.services import get_game_manager, get_navigation_manager
 from src.utils import Logger
 
@@ -122,14 +122,9 @@ class FullMapOverlay(Overlay):
         # Perform A* pathfinding
         Logger.info(f"Finding path to {landmark_name}...")
         
-        # Create pathfinding grid
-        map_width_tiles = current_map.tmxdata.width
-        map_height_tiles = current_map.tmxdata.height
-        # from src.core.man
-
+        # Map's prebuilt pathfinding grid, with the trainers standing on it blocked
         co = [i.animation.rect for i in game_manager.enemy_trainers[game_manager.current_map_key]]
-        co.extend(current_map._collision_map)
-        grid = PathfindingGrid(map_width_tiles, map_height_tiles, co) 
+        grid = current_map.pathfinding_grid.with_blocked(co)
         
         # Convert positions to tiles
         player_tile = pixel_to_tile(int(player.position.x), int(player.position.y))
@@ -138,14 +133,15 @@ class FullMapOverlay(Overlay):
         # print(player_tile, target_tile)
         
         Logger.info(f"Testing navigation: {player_tile} -> {target_tile}")
-        # Find path
-        tile_path = a_star(grid, player_tile, target_tile)
+        # Find path (or reuse one from an earlier click)
+        navigation_manager = get_navigation_manager()
+        tile_path = navigation_manager.path_cache.find_path(
+            current_map.path_name, grid, player_tile, target_tile)
         
         if tile_path:
             # Convert back to pixel positions
             
             # Start navigation
-            navigation_manager = get_navigation_manager()
             navigation_manager.start_navigation(tile_path, landmark_name)
             
             Logger.info(f"Navigation started to {landmark_name} ({len(tile_path)} waypoints)")
@@ -211,7 +211,8 @@ class BattleScene(Scene):
 
     @override
     def exit(self) -> None:
-        pass
+        if self.kind == BattleState.ONLINE_BATTLE:
+            self.online_manager.stop_battle_watch()
 
     def update_content(self, dt: float) -> None:
             
@@ -683,8 +684,10 @@ class BattleScene(Scene):
                     # Debuging branch - should be very brief , maybe use if the internet is slow
                     self.DialogOverlay.dialog_text = ["Submitting action..."]
                 else:
-                    # Stage 3: Poll battle status
-                    battle_status = self.online_manager.get_battle_status(self.battle_id)
+                    # Stage 3: Poll battle status (filled in by the OnlineManager in the background)
+                    battle_status = self.online_manager.poll_battle_status(self.battle_id)
+                    if battle_status is None:
+                        return
                     if not battle_status: #ERROR HANDLING
                         # If we can't get status, battle was deleted - exit gracefully
                         # Use pagination system for exit message
@@ -697,8 +700,8 @@ class BattleScene(Scene):
                         self.lost = True
                         return
                     
-                    # Check if battle is already marked as FINISHED
-                    if battle_status.get('status') == 'finished':
+                    # Check if battle is already marked as FINISHED (or a player timed out)
+                    if battle_status.get('status') in ('finished', 'timeout'):
                         print("[BATTLE] Battle already finished, checking results...")
                         # Process final state - UPDATE POKEMON STATUS FIRST
                         my_id = self.online_manager.player_id
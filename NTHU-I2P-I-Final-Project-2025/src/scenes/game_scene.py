@@ -34,8 +34,6 @@ class GameScene(Scene):
         self.online_manager = get_online_manager()
 
         self.list_online_players : list[dict] = []
-        self.battle_check_timer = 0.0  # Timer for checking pending battles
-        self.battle_check_interval = 1.0  # Check every 1 second
 
         for overlay in self.overlays.values():
             overlay.set_close_callback(self.overlay_close)
@@ -157,7 +155,7 @@ class GameScene(Scene):
         if input_manager.key_pressed(pg.K_m) and self.game_manager.player:
             teleporters = self.game_manager.current_map.teleporters
             if teleporters:
-                from src.utils.pathfinding import PathfindingGrid, a_star, pixel_to_tile, tile_to_pixel
+                from src.utils.pathfinding import pixel_to_tile
                 
                 # Get player position
                 player_tile = pixel_to_tile(
@@ -174,15 +172,13 @@ class GameScene(Scene):
                 
                 Logger.info(f"Testing navigation: {player_tile} -> {target_tile}")
                 
-                # Build pathfinding grid
-                map_width_tiles = self.game_manager.current_map.tmxdata.width
-                map_height_tiles = self.game_manager.current_map.tmxdata.height
-                collision_map = self.game_manager.current_map._collision_map
+                # Pathfinding grid prebuilt by the map
+                current_map = self.game_manager.current_map
+                grid = current_map.pathfinding_grid
                 
-                grid = PathfindingGrid(map_width_tiles, map_height_tiles, collision_map)
-                
-                # Find path
-                tile_path = a_star(grid, player_tile, target_tile)
+                # Find path (or reuse one)
+                tile_path = self.navigation_manager.path_cache.find_path(
+                    current_map.path_name, grid, player_tile, target_tile)
                 # print(tile_path)
                 if tile_path:
                     # Convert to pixel coordinates (center of tiles)
@@ -203,30 +199,26 @@ class GameScene(Scene):
             self.overlays[self.overlay].update(dt)
             self.game_manager.need_overlay = None
         
-        # Check for pending battles periodically
-        self.battle_check_timer += dt
-        if self.battle_check_timer >= self.battle_check_interval:
-            self.battle_check_timer = 0.0
-            pending_battle = self.online_manager.check_pending_battle()
-            print(f"[BATTLE CHECK] Checking pending battle for player_id={self.online_manager.player_id}: {pending_battle}")
-            if pending_battle.get('has_battle'):
-                battle_id = pending_battle.get('battle_id')
-                opponent_id = pending_battle.get('opponent_id')
-                Logger.info(f"Auto-joining battle {battle_id} with opponent {opponent_id}")
-                
-                # Prepare battle info with existing battle_id
-                battle_info = {
-                    "online_battle": {
-                        "opponent_id": opponent_id,
-                        "battle_id": battle_id,  # Use existing battle
-                        "is_joiner": True  # Mark as joining player
-                    }
+        # Pending battles are pushed by the server, this is a local lookup
+        pending_battle = self.online_manager.check_pending_battle()
+        if pending_battle.get('has_battle'):
+            battle_id = pending_battle.get('battle_id')
+            opponent_id = pending_battle.get('opponent_id')
+            Logger.info(f"Auto-joining battle {battle_id} with opponent {opponent_id}")
+            
+            # Prepare battle info with existing battle_id
+            battle_info = {
+                "online_battle": {
+                    "opponent_id": opponent_id,
+                    "battle_id": battle_id,  # Use existing battle
+                    "is_joiner": True  # Mark as joining player
                 }
-                
-                # Change to battle scene
-                
-                scene_manager.change_scene("battle", battle_info)
-                return
+            }
+            
+            # Change to battle scene
+            
+            scene_manager.change_scene("battle", battle_info)
+            return
         
          # Update online manager
 
@@ -327,7 +319,9 @@ class GameScene(Scene):
             for player in self.list_online_players:
                 if player["map"] == self.game_manager.current_map.path_name:
                     cam = self.game_manager.player.camera
-                    pos = cam.transform_position_as_position(Position(player["x"], player["y"]))
+                    # Smoothed between server snapshots instead of jumping to each one
+                    x, y = self.online_manager.get_draw_position(player)
+                    pos = cam.transform_position_as_position(Position(x, y))
                     # import random
                     # print(player)
                     # continue
@@ -356,7 +350,7 @@ class GameScene(Scene):
             self.minimap.draw(
                 screen=screen,
                 player_pos=self.game_manager.player.position,
-                collision_map=self.game_manager.current_map._collision_map,
+                grid=self.game_manager.current_map.pathfinding_grid,
                 other_players=self.list_online_players,
                 npcs=npc_data,
                 teleporters=self.game_manager.current_map.teleporters,
@@ -0,0 +1,97 @@
+"""
+Smooth drawing of remote players between position snapshots.
+
+The server stamps every player with "t", the server time of its last move.
+Positions are drawn slightly in the past (`delay`), so there is normally a
+snapshot on each side of the drawn instant to interpolate between. A
+walking player reports every `interval` seconds; a longer gap means it
+stood still, and only the last `interval` of the gap is animated. When
+snapshots run late the last known velocity is extrapolated for at most
+`extrapolate` seconds, then the player settles back onto its last reported
+position (it most likely stopped walking).
+"""
+
+from collections import deque
+
+HISTORY = 8  # Samples kept per player
+
+
+class SnapshotInterpolator:
+    _samples: dict[int, deque[tuple[float, float, float]]]  # pid -> (server time, x, y)
+    _maps: dict[int, str]
+    _offset: float | None  # Local clock minus server clock, lowest seen (includes the fastest delivery)
+
+    def __init__(self, interval: float, delay: float, extrapolate: float):
+        self.interval = interval
+        self.delay = delay
+        self.extrapolate = extrapolate
+        self._samples = {}
+        self._maps = {}
+        self._offset = None
+
+    def observe_clock(self, server_time: float, local_time: float) -> None:
+        """Any server timestamp seen at `local_time` bounds the clock offset from above"""
+        offset = local_time - server_time
+        if self._offset is None or offset < self._offset:
+            self._offset = offset
+
+    def push(self, player: dict, local_time: float) -> None:
+        """Record a player dict as received from the server"""
+        pid = int(player["id"])
+        t = player.get("t")
+        if t is None:
+            # Server without timestamps: use the arrival time instead
+            t = local_time - (self._offset or 0.0)
+        else:
+            self.observe_clock(t, local_time)
+        samples = self._samples.get(pid)
+        if samples is None or self._maps.get(pid) != player["map"]:
+            # New player or teleported to another map: nothing to blend from
+            samples = self._samples[pid] = deque(maxlen=HISTORY)
+            self._maps[pid] = player["map"]
+        elif samples[-1][0] >= t:
+            # Same snapshot again (polling re-sends everyone)
+            return
+        samples.append((t, player["x"], player["y"]))
+
+    def retain(self, pids) -> None:
+        """Forget players that are no longer listed"""
+        keep = set(pids)
+        for pid in [p for p in self._samples if p not in keep]:
+            del self._samples[pid]
+            del self._maps[pid]
+
+    def position(self, pid: int, local_time: float) -> tuple[float, float] | None:
+        samples = self._samples.get(pid)
+        if not samples:
+            return None
+        t = local_time - (self._offset or 0.0) - self.delay
+
+        t1, x1, y1 = samples[-1]
+        if t >= t1:
+            if len(samples) < 2:
+                return x1, y1
+            t0, x0, y0 = samples[-2]
+            span = t1 - t0
+            if span <= 0 or span > 2 * self.interval:
+                # The previous sample is from before a pause, there is no current velocity
+                return x1, y1
+            ahead = t - t1
+            if ahead > self.extrapolate:
+                # Ease back to the last report over the same amount of time
+                ahead = max(0.0, 2 * self.extrapolate - ahead)
+            k = ahead / span
+            return x1 + (x1 - x0) * k, y1 + (y1 - y0) * k
+
+        # Newest sample at or before t, interpolate towards the one after it
+        for i in range(len(samples) - 2, -1, -1):
+            t0, x0, y0 = samples[i]
+            if t0 <= t:
+                ta, xa, ya = samples[i + 1]
+                t0 = max(t0, ta - self.interval)
+                if t <= t0:
+                    return x0, y0
+                k = (t - t0) / (ta - t0)
+                return x0 + (xa - x0) * k, y0 + (ya - y0) * k
+        # Older than anything we have
+        return samples[0][1], samples[0][2]
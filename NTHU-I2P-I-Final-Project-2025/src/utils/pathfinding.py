@@ -2,7 +2,9 @@
 Pathfinding utilities using A* algorithm for navigation system.
 """
 
+import hashlib
 import heapq
+from collections import OrderedDict
 from typing import List, Tuple, Optional
 import pygame as pg
 from src.utils import GameSettings
@@ -73,26 +75,40 @@ def euclidean_distance(pos1: Tuple[int, int], pos2: Tuple[int, int]) -> float:
 class PathfindingGrid:
     """
     Tile-based grid for pathfinding.
-    Precomputes walkable/non-walkable tiles from collision map.
+    Wraps a walkable/non-walkable tile bitmap (one byte per tile, row-major).
+    Each Map builds one at load time; don't modify `walkable` in place, use
+    `with_blocked` for per-request obstacles.
     """
     
-    def __init__(self, map_width_tiles: int, map_height_tiles: int, collision_map: list[pg.Rect],):
+    def __init__(self, map_width_tiles: int, map_height_tiles: int, walkable: bytearray):
         """
         Initialize pathfinding grid.
         
         Args:
             map_width_tiles: Width of map in tiles
             map_height_tiles: Height of map in tiles
-            collision_map: List of collision rectangles (in pixels)
+            walkable: width * height bytes, 1 for walkable tiles and 0 for collision tiles
         """
         self.width = map_width_tiles
         self.height = map_height_tiles
-        
-        # Initialize all tiles as walkable
-        self.grid = [[True] * map_width_tiles for _ in range(map_height_tiles)]
-        # collision_map.extend()
-        # Mark collision tiles as non-walkable
-        for rect in collision_map:
+        self.walkable = walkable
+        self._padded = None
+        self._jump_stops = None
+        self._digest = None
+    
+    def with_blocked(self, rects: list[pg.Rect]) -> "PathfindingGrid":
+        """
+        Copy of this grid with the tiles under `rects` (in pixels) made non-walkable,
+        e.g. for NPCs standing on the map. This grid is left untouched.
+        """
+        if not rects:
+            return self
+        grid = PathfindingGrid(self.width, self.height, bytearray(self.walkable))
+        grid._block(rects)
+        return grid
+    
+    def _block(self, rects: list[pg.Rect]) -> None:
+        for rect in rects:
             # Convert pixel coordinates to tile coordinates
             tile_x = rect.x // GameSettings.TILE_SIZE
             tile_y = rect.y // GameSettings.TILE_SIZE
@@ -105,8 +121,81 @@ class PathfindingGrid:
                 for dx in range(tile_width):
                     tx = tile_x + dx
                     ty = tile_y + dy
-                    if 0 <= tx < map_width_tiles and 0 <= ty < map_height_tiles:
-                        self.grid[ty][tx] = False
+                    if 0 <= tx < self.width and 0 <= ty < self.height:
+                        self.walkable[ty * self.width + tx] = 0
+    
+    def padded(self) -> bytearray:
+        """
+        `walkable` with a ring of non-walkable tiles around it, (width + 2) * (height + 2)
+        bytes. Searches step through it without bounds checks. Built on first use.
+        """
+        if self._padded is None:
+            stride = self.width + 2
+            padded = bytearray(stride * (self.height + 2))
+            for y in range(self.height):
+                start = (y + 1) * stride + 1
+                padded[start:start + self.width] = self.walkable[y * self.width:(y + 1) * self.width]
+            self._padded = padded
+        return self._padded
+    
+    def digest(self) -> bytes:
+        """Short hash of the size and walkable tiles, equal for equal grids. Built on first use."""
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(self.width.to_bytes(4, "little") + self.height.to_bytes(4, "little"))
+            h.update(self.walkable)
+            self._digest = h.digest()
+        return self._digest
+    
+    def jump_stops(self) -> dict[int, bytearray]:
+        """
+        For jump point search: per step direction in padded() (+1, -1, +stride, -stride),
+        the tiles where a straight jump that way stops. That is walls, tiles with a forced
+        neighbor (a side opening that was blocked one tile back) and, for vertical jumps,
+        tiles from which a horizontal jump would stop on a walkable tile. Only the goal
+        depends on the search, it is checked separately. Built on first use.
+        """
+        if self._jump_stops is None:
+            cells = self.padded()
+            stride = self.width + 2
+            size = len(cells)
+            # Whole-grid bit operations: byte lane i of these ints is tile i of padded()
+            ones = int.from_bytes(b"\x01" * size, "little")
+            walk = int.from_bytes(cells, "little")
+            
+            def shifted(offset: int) -> int:
+                """Lane i holds cells[i + offset]"""
+                return (walk >> 8 * offset if offset >= 0 else walk << -8 * offset) & ones
+            
+            def stops_for(step: int, side: int) -> int:
+                forced = ((shifted(-side) & (shifted(-side - step) ^ ones)) |
+                          (shifted(side) & (shifted(side - step) ^ ones)))
+                return (walk ^ ones) | (walk & forced)
+            
+            right, left = stops_for(1, stride), stops_for(-1, stride)
+            # Tiles whose horizontal jump stops on a walkable tile: for each such tile, the run
+            # leading up to it, including the previous stop (a jump looks past its own tile)
+            in_sight = bytearray(size)
+            for stops, step in ((right, 1), (left, -1)):
+                targets = (stops & walk).to_bytes(size, "little")
+                stops = stops.to_bytes(size, "little")
+                target = targets.find(1)
+                while target != -1:
+                    if step == 1:
+                        begin, end = stops.rfind(1, 0, target), target
+                    else:
+                        begin, end = target + 1, stops.find(1, target + 1) + 1
+                    in_sight[begin:end] = b"\x01" * (end - begin)
+                    target = targets.find(1, target + 1)
+            in_sight = int.from_bytes(in_sight, "little")
+            
+            self._jump_stops = {
+                step: bytearray(lanes.to_bytes(size, "little")) for step, lanes in (
+                    (1, right), (-1, left),
+                    (stride, stops_for(stride, 1) | in_sight),
+                    (-stride, stops_for(-stride, 1) | in_sight))
+            }
+        return self._jump_stops
     
     def is_walkable(self, tile_x: int, tile_y: int) -> bool:
         """
@@ -120,7 +209,7 @@ class PathfindingGrid:
             True if tile is walkable, False otherwise
         """
         if 0 <= tile_x < self.width and 0 <= tile_y < self.height:
-            return self.grid[tile_y][tile_x]
+            return self.walkable[tile_y * self.width + tile_x] == 1
         return False
     
     def get_neighbors(self, tile_x: int, tile_y: int, allow_diagonal: bool = False) -> List[Tuple[int, int]]:
@@ -156,95 +245,352 @@ class PathfindingGrid:
 def a_star(grid: PathfindingGrid, 
            start: Tuple[int, int], 
            goal: Tuple[int, int],
-           allow_diagonal: bool = False) -> Optional[List[Tuple[int, int]]]:
+           allow_diagonal: bool = False,
+           jump_points: bool = False) -> Optional[List[Tuple[int, int]]]:
     """
     A* pathfinding algorithm.
     
+    Nodes are indices into `grid.padded()`, and the scores live in flat lists sized
+    to the grid. Open-set entries are packed into single ints (f, then push order,
+    then node) so the heap compares plain ints. Ties are broken exactly as in the
+    original dict-based version (first pushed wins, and an open node whose g improves
+    keeps its old heap entry), so both return the same path.
+    
     Args:
         grid: PathfindingGrid instance
         start: Starting position (tile_x, tile_y)
         goal: Goal position (tile_x, tile_y)
         allow_diagonal: If True, allow diagonal movement
+        jump_points: If True, use Jump Point Search (4-connected only). It returns
+            a path of the same (shortest) length, not necessarily the same path,
+            and expands far fewer nodes on open ground
         
     Returns:
         List of (tile_x, tile_y) positions representing the path,
-        or None if no path exists.
+        or None if no path exists (or start/goal is not walkable).
         The path includes both start and goal positions.
     """
-    # Check if start and goal are walkable
-    if not grid.is_walkable(*start):
-        print(f"[A*] Start position {start} is not walkable")
-        return None
+    if jump_points and allow_diagonal:
+        raise ValueError("Jump point search only supports 4-connected movement")
     
-    if not grid.is_walkable(*goal):
-        print(f"[A*] Goal position {goal} is not walkable")
+    # Check if start and goal are walkable
+    if not grid.is_walkable(*start) or not grid.is_walkable(*goal):
         return None
     
     # If start == goal, return single-point path
     if start == goal:
         return [start]
     
-    # Priority queue: (f_score, counter, node)
-    # counter ensures stable sorting when f_scores are equal
-    counter = 0
-    open_set = [(0, counter, start)]
+    cells = grid.padded()
+    stride = grid.width + 2
+    start_id = (start[1] + 1) * stride + start[0] + 1
+    goal_id = (goal[1] + 1) * stride + goal[0] + 1
     
-    # Track where each node came from
-    came_from = {}
-    
-    # Cost from start to each node
-    g_score = {start: 0}
+    if jump_points:
+        came_from = _search_jump(cells, grid.jump_stops(), stride, start_id, goal_id)
+    elif allow_diagonal:
+        came_from = _search_diagonal(cells, stride, start_id, goal_id)
+    else:
+        came_from = _search(cells, stride, start_id, goal_id)
+    if came_from is None:
+        return None
     
-    # Estimated total cost (g_score + heuristic)
-    f_score = {start: manhattan_distance(start, goal)}
+    # Reconstruct path. Jump point links span straight runs of tiles, fill them in
+    path = []
+    node = goal_id
+    while node != start_id:
+        parent = came_from[node]
+        step = _unit_step(parent, node, stride) if jump_points else node - parent
+        while node != parent:
+            y, x = divmod(node, stride)
+            path.append((x - 1, y - 1))
+            node -= step
+    path.append(start)
+    return path[::-1]  # Reverse to get start->goal order
+
+def _search(cells: bytearray, stride: int, start: int, goal: int) -> Optional[List[int]]:
+    """4-connected A* over padded cells; the came-from list, or None if goal is unreachable"""
+    size = len(cells)
+    node_bits = size.bit_length()
+    node_mask = (1 << node_bits) - 1
+    f_shift = node_bits + 32  # Push counter gets 32 bits
+    goal_y, goal_x = divmod(goal, stride)
+    # Same neighbor order as get_neighbors: down, right, up, left
+    steps = ((stride, 0, 1), (1, 1, 0), (-stride, 0, -1), (-1, -1, 0))
     
-    # Nodes in open set (for fast membership check)
-    open_set_hash = {start}
+    g_score = [size] * size  # size: never reached (longer than any path)
+    came_from = [-1] * size
+    in_open = bytearray(size)
+    g_score[start] = 0
+    in_open[start] = 1
+    open_set = [start]  # The start is pushed with f = 0 and counter 0
+    counter = 0
+    pop, push = heapq.heappop, heapq.heappush
     
     while open_set:
-        _, _, current = heapq.heappop(open_set)
-        open_set_hash.discard(current)
+        current = pop(open_set) & node_mask
+        in_open[current] = 0
+        if current == goal:
+            return came_from
         
-        # Check if we reached the goal
+        tentative = g_score[current] + 1
+        cy, cx = divmod(current, stride)
+        for step, dx, dy in steps:
+            neighbor = current + step
+            if cells[neighbor] and tentative < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative
+                if not in_open[neighbor]:
+                    counter += 1
+                    f = tentative + (abs(cx + dx - goal_x) + abs(cy + dy - goal_y))
+                    push(open_set, (f << f_shift) | (counter << node_bits) | neighbor)
+                    in_open[neighbor] = 1
+    return None
+
+def _search_diagonal(cells: bytearray, stride: int, start: int, goal: int) -> Optional[List[int]]:
+    """
+    8-connected variant of _search. Diagonal steps cost 1.414, so f is a float and the
+    open set holds (f, counter, node) tuples.
+    """
+    size = len(cells)
+    goal_y, goal_x = divmod(goal, stride)
+    steps = ((stride, 0, 1, 1.0), (1, 1, 0, 1.0), (-stride, 0, -1, 1.0), (-1, -1, 0, 1.0),
+             (stride + 1, 1, 1, 1.414), (1 - stride, 1, -1, 1.414),
+             (stride - 1, -1, 1, 1.414), (-stride - 1, -1, -1, 1.414))
+    
+    g_score = [float("inf")] * size
+    came_from = [-1] * size
+    in_open = bytearray(size)
+    g_score[start] = 0
+    in_open[start] = 1
+    open_set = [(0, 0, start)]
+    counter = 0
+    pop, push = heapq.heappop, heapq.heappush
+    
+    while open_set:
+        current = pop(open_set)[2]
+        in_open[current] = 0
         if current == goal:
-            # Reconstruct path
-            path = []
-            while current in came_from:
-                path.append(current)
-                current = came_from[current]
-            path.append(start)
-            return path[::-1]  # Reverse to get start->goal order
+            return came_from
         
-        # Explore neighbors
-        for neighbor in grid.get_neighbors(*current, allow_diagonal=allow_diagonal):
-            # Calculate cost to reach neighbor
-            # Diagonal moves cost sqrt(2) ≈ 1.414, cardinal moves cost 1
-            if allow_diagonal:
-                dx = abs(neighbor[0] - current[0])
-                dy = abs(neighbor[1] - current[1])
-                move_cost = 1.414 if (dx + dy) == 2 else 1.0
-            else:
-                move_cost = 1
-            
-            tentative_g_score = g_score[current] + move_cost
-            
-            # If this is a better path to neighbor, update it
-            if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+        g = g_score[current]
+        cy, cx = divmod(current, stride)
+        for step, dx, dy, cost in steps:
+            neighbor = current + step
+            tentative = g + cost
+            if cells[neighbor] and tentative < g_score[neighbor]:
                 came_from[neighbor] = current
-                g_score[neighbor] = tentative_g_score
-                f = tentative_g_score + manhattan_distance(neighbor, goal)
-                f_score[neighbor] = f
-                
-                # Add to open set if not already there
-                if neighbor not in open_set_hash:
+                g_score[neighbor] = tentative
+                if not in_open[neighbor]:
                     counter += 1
-                    heapq.heappush(open_set, (f, counter, neighbor))
-                    open_set_hash.add(neighbor)
+                    f = tentative + (abs(cx + dx - goal_x) + abs(cy + dy - goal_y))
+                    push(open_set, (f, counter, neighbor))
+                    in_open[neighbor] = 1
+    return None
+
+def _unit_step(source: int, target: int, stride: int) -> int:
+    """Offset of one tile along the straight line from padded node `source` to `target`"""
+    if abs(target - source) < stride:
+        return 1 if target > source else -1
+    return stride if target > source else -stride
+
+def _jump(cells: bytearray, stops: bytearray, stride: int, node: int, step: int, goal: int) -> int:
+    """
+    Jump from `node` in direction `step` and return the first jump point (the goal or a
+    walkable stop tile), or -1 if a wall comes first.
+    """
+    if step == 1 or step == -1:
+        # Along a row: one bytes search, the padding guarantees a stop before the row ends
+        stop = stops.find(1, node + 1) if step == 1 else stops.rfind(1, 0, node)
+        if goal // stride == node // stride and 0 < (goal - node) * step <= (stop - node) * step:
+            return goal
+        return stop if cells[stop] else -1
+    # Down/up a column: stop also on the goal's row if the goal is in sight along it
+    in_row = goal // stride * stride + node % stride
+    while True:
+        node += step
+        if stops[node]:
+            return node if cells[node] else -1
+        if node == in_row:
+            low, high = min(node, goal), max(node, goal)
+            if cells.find(0, low, high) == -1:
+                return node
+
+def _search_jump(cells: bytearray, stops: dict[int, bytearray], stride: int,
+                 start: int, goal: int) -> Optional[List[int]]:
+    """
+    4-connected Jump Point Search. Only jump points enter the open set, each linked to the
+    jump point it was reached from along a straight line. Same heap entries as _search;
+    a node whose g improves is pushed again and the stale entry skipped.
+    """
+    size = len(cells)
+    node_bits = size.bit_length()
+    node_mask = (1 << node_bits) - 1
+    f_shift = node_bits + 32
+    goal_y, goal_x = divmod(goal, stride)
+    # Directions worth trying after arriving along each one: never back where we came from
+    horizontal = (-stride, stride)
+    vertical = (-1, 1)
+    
+    g_score = [size] * size
+    came_from = [-1] * size
+    closed = bytearray(size)
+    g_score[start] = 0
+    open_set = [start]
+    counter = 0
+    pop, push = heapq.heappop, heapq.heappush
     
-    # No path found
-    print(f"[A*] No path found from {start} to {goal}")
+    while open_set:
+        current = pop(open_set) & node_mask
+        if closed[current]:
+            continue
+        closed[current] = 1
+        if current == goal:
+            return came_from
+        
+        parent = came_from[current]
+        if parent == -1:
+            steps = (1, -1, stride, -stride)
+        else:
+            forward = _unit_step(parent, current, stride)
+            steps = (forward,) + (horizontal if forward in (1, -1) else vertical)
+        
+        g = g_score[current]
+        for step in steps:
+            jump = _jump(cells, stops[step], stride, current, step, goal)
+            if jump == -1 or closed[jump]:
+                continue
+            jy, jx = divmod(jump, stride)
+            tentative = g + abs(jx - current % stride) + abs(jy - current // stride)
+            if tentative < g_score[jump]:
+                came_from[jump] = current
+                g_score[jump] = tentative
+                counter += 1
+                f = tentative + (abs(jx - goal_x) + abs(jy - goal_y))
+                push(open_set, (f << f_shift) | (counter << node_bits) | jump)
     return None
 
+GridKey = Tuple[str, bytes]  # (map, grid digest)
+PathKey = Tuple[GridKey, Tuple[int, int], Tuple[int, int]]  # (grid, start tile, goal tile)
+
+class PathCache:
+    """
+    LRU cache of a_star results (jump point search), keyed by map, grid, start tile and goal tile.
+    
+    A miss can still reuse a searched path to the same goal that passes within
+    `splice_radius` steps of the start: the shortest walk onto it is spliced onto the rest
+    of it. The rest of a shortest path is itself shortest, so a spliced path is at most
+    2 * splice_radius steps longer than the shortest one. Spliced paths are cached but
+    never spliced onto, so the error doesn't add up.
+    
+    Grids are told apart by PathfindingGrid.digest(), computed once per grid, so the plain
+    map grid and copies `with_blocked` obstacles keep separate entries side by side.
+    Entries for grids no longer asked about simply age out, or go on `invalidate()`.
+    """
+    
+    _paths: "OrderedDict[PathKey, Optional[List[Tuple[int, int]]]]"  # Least recently used first
+    _searched: set[PathKey]  # Keys of paths that came from a full search, the only ones spliced onto
+    _routes: dict[tuple[GridKey, Tuple[int, int]], dict[Tuple[int, int], tuple[int, PathKey, int]]]
+    #   (grid, goal) -> tile -> (steps left to goal, searched path through it, index in that path)
+    
+    def __init__(self, capacity: int = None, splice_radius: int = None):
+        self.capacity = capacity or GameSettings.NAV_PATH_CACHE_SIZE
+        self.splice_radius = GameSettings.NAV_SPLICE_RADIUS if splice_radius is None else splice_radius
+        self._paths = OrderedDict()
+        self._searched = set()
+        self._routes = {}
+        self.hits = self.splices = self.misses = 0
+    
+    def find_path(self, map_name: str, grid: PathfindingGrid,
+                  start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """a_star(grid, start, goal, jump_points=True), or a cached or spliced path"""
+        grid_key = (map_name, grid.digest())
+        key = (grid_key, start, goal)
+        if key in self._paths:
+            self.hits += 1
+            self._paths.move_to_end(key)
+            path = self._paths[key]
+        else:
+            path = self._splice(grid_key, grid, start, goal)
+            if path is not None:
+                self.splices += 1
+                self._store(key, path, searched=False)
+            else:
+                self.misses += 1
+                path = a_star(grid, start, goal, jump_points=True)
+                self._store(key, path, searched=True)
+        return list(path) if path is not None else None
+    
+    def invalidate(self, map_name: str = None) -> None:
+        """Drop the cached paths of one map, or of every map"""
+        for key in [k for k in self._paths if map_name is None or k[0][0] == map_name]:
+            del self._paths[key]
+            self._searched.discard(key)
+        for route in [r for r in self._routes if map_name is None or r[0][0] == map_name]:
+            del self._routes[route]
+    
+    def _splice(self, grid_key: GridKey, grid: PathfindingGrid,
+                start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """Shortest walk (of at most splice_radius steps) onto a searched path to goal, joined to its rest"""
+        routes = self._routes.get((grid_key, goal))
+        if not routes or not grid.is_walkable(*start):
+            return None
+        
+        # Breadth-first around the start, keeping the reached tile with the shortest total
+        best = None  # (total steps, tile)
+        came_from = {start: None}
+        frontier = [start]
+        for steps in range(self.splice_radius + 1):
+            for tile in frontier:
+                route = routes.get(tile)
+                if route and (best is None or steps + route[0] < best[0]):
+                    best = (steps + route[0], tile)
+            if steps == self.splice_radius:
+                break
+            reached = []
+            for x, y in frontier:
+                for neighbor in ((x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)):
+                    if neighbor not in came_from and grid.is_walkable(*neighbor):
+                        came_from[neighbor] = (x, y)
+                        reached.append(neighbor)
+            frontier = reached
+        if best is None:
+            return None
+        
+        tile = best[1]
+        _, key, index = routes[tile]
+        bridge = []
+        while tile is not None:
+            bridge.append(tile)
+            tile = came_from[tile]
+        return bridge[::-1] + self._paths[key][index + 1:]
+    
+    def _store(self, key: PathKey, path: Optional[List[Tuple[int, int]]], searched: bool) -> None:
+        self._paths[key] = path
+        if searched and path is not None:
+            self._searched.add(key)
+            self._add_route(key, path)
+        while len(self._paths) > self.capacity:
+            oldest = next(iter(self._paths))
+            del self._paths[oldest]
+            if oldest in self._searched:
+                self._searched.discard(oldest)
+                self._rebuild_routes(oldest[0], oldest[2])
+    
+    def _add_route(self, key: PathKey, path: List[Tuple[int, int]]) -> None:
+        routes = self._routes.setdefault((key[0], key[2]), {})
+        for i, tile in enumerate(path):
+            left = len(path) - 1 - i
+            if tile not in routes or left < routes[tile][0]:
+                routes[tile] = (left, key, i)
+    
+    def _rebuild_routes(self, grid_key: GridKey, goal: Tuple[int, int]) -> None:
+        """Index the searched paths to goal again, after one of them was evicted"""
+        self._routes.pop((grid_key, goal), None)
+        for key in self._searched:
+            if key[0] == grid_key and key[2] == goal:
+                self._add_route(key, self._paths[key])
+
 def smooth_path(path: List[Tuple[int, int]], grid: PathfindingGrid) -> List[Tuple[int, int]]:
     """
     Smooth a path by removing unnecessary waypoints.
@@ -17,6 +17,9 @@ class Settings:
     # Online
     IS_ONLINE: bool = True
     ONLINE_SERVER_URL: str = "http://localhost:8989"
+    ONLINE_SEND_RATE: float = 10.0   # Position uploads per second (remote players are interpolated in between)
+    ONLINE_AOI_RADIUS: int = 40      # Other players are only received within this many tiles
+    ONLINE_WIRE_FORMAT: str = "json" # "json" or "binary" (compact struct) for position updates
     MAX_MONSTERS_IN_BAG: int = 20    # Maximum number of monsters in player's bag
     
 
@@ -29,5 +32,7 @@ class Settings:
     NAV_DEFAULT_SPEED = 1.0          # 預設速度
     NAV_PATH_COLOR = (255, 255, 0)   # 路徑顏色（黃色）
     NAV_ARRIVAL_DISTANCE = 3        # 到達判定距離（像素）
+    NAV_PATH_CACHE_SIZE = 64         # Paths kept for reuse (least recently used dropped first)
+    NAV_SPLICE_RADIUS = 3            # Reuse a cached path passing within this many tiles of the start
 
 GameSettings = Settings()
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Compact binary encoding for the position channel between OnlineManager and server.py.
+
+A position update is a fixed 11 byte struct:
+    player id   uint32
+    x, y        uint16  quantized to 1/POS_SCALE of a tile
+    map index   uint16  index into the server's map table (see MapTable)
+    direction   uint8   index into DIRECTIONS
+
+JSON stays the default format; a client switches to this one only after
+the server lists it in GET /wire.
+"""
+
+import struct
+import threading
+
+CONTENT_TYPE = "application/x-monster-pos"
+POS_SCALE = 64          # Sub-tile steps, 1 pixel with the default 64px tiles
+TILE_SIZE = 64          # Must match GameSettings.TILE_SIZE
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT", "NONE")
+MAX_MAPS = 256          # Names a MapTable holds, well below the uint16 index limit
+MAX_MAP_NAME = 64       # Bytes of UTF-8 per map name
+
+_POSITION = struct.Struct("<IHHHB")
+_MAX_COORD = 0xFFFF
+_DIRECTION_INDEX = {name: i for i, name in enumerate(DIRECTIONS)}
+
+POSITION_SIZE = _POSITION.size
+
+
+def quantize(pixels: float) -> int:
+    q = int(round(pixels * POS_SCALE / TILE_SIZE))
+    return min(max(q, 0), _MAX_COORD)
+
+
+def dequantize(q: int) -> float:
+    return q * TILE_SIZE / POS_SCALE
+
+
+def pack_position(pid: int, x: float, y: float, map_index: int, direction: str) -> bytes:
+    return _POSITION.pack(pid, quantize(x), quantize(y), map_index,
+                          _DIRECTION_INDEX.get(direction.upper(), _DIRECTION_INDEX["NONE"]))
+
+
+def unpack_position(data: bytes) -> tuple[int, float, float, int, str]:
+    """Returns (player id, x, y, map index, direction name). Raises ValueError on bad input."""
+    try:
+        pid, qx, qy, map_index, d = _POSITION.unpack(data)
+    except struct.error as e:
+        raise ValueError(str(e)) from e
+    if d >= len(DIRECTIONS):
+        raise ValueError(f"bad direction {d}")
+    return pid, dequantize(qx), dequantize(qy), map_index, DIRECTIONS[d]
+
+
+def pack_positions(records: list[tuple[int, float, float, int, str]]) -> bytes:
+    return b"".join(pack_position(*r) for r in records)
+
+
+def unpack_positions(data: bytes) -> list[tuple[int, float, float, int, str]]:
+    if len(data) % POSITION_SIZE:
+        raise ValueError("truncated position list")
+    return [unpack_position(data[i:i + POSITION_SIZE]) for i in range(0, len(data), POSITION_SIZE)]
+
+
+class MapTable:
+    """
+    Interns map names to small integers, shared by all clients of one server.
+    Holds at most MAX_MAPS names: index_of raises ValueError for a name longer than
+    MAX_MAP_NAME bytes and RuntimeError once the table is full.
+    """
+
+    def __init__(self, names: list[str] = ()):
+        self._lock = threading.Lock()
+        self._names: list[str] = []
+        self._indices: dict[str, int] = {}
+        for name in names:
+            self.index_of(name)
+
+    def index_of(self, name: str) -> int:
+        with self._lock:
+            idx = self._indices.get(name)
+            if idx is None:
+                if len(name.encode("utf-8")) > MAX_MAP_NAME:
+                    raise ValueError(f"map name longer than {MAX_MAP_NAME} bytes")
+                if len(self._names) >= MAX_MAPS:
+                    raise RuntimeError("map table full")
+                idx = len(self._names)
+                self._names.append(name)
+                self._indices[name] = idx
+            return idx
+
+    def name_of(self, index: int) -> str | None:
+        with self._lock:
+            return self._names[index] if 0 <= index < len(self._names) else None